@@ -1,14 +1,7 @@
-from src.gui.main_window import MainWindow
-from src.core.logger import loguru_formatter, get_log_filename
-from loguru import logger
 import os
 import sys
 import argparse
 
-# 配置日志
-logger.remove()
-logger.add(sys.stderr, format=loguru_formatter, level="INFO")
-
 
 def main():
     parser = argparse.ArgumentParser(description="AI Town Simulation")
@@ -17,6 +10,24 @@ def main():
     )
     args = parser.parse_args()
 
+    # 实时模拟需在导入配置之前加载 .env，使其中的变量对 Config 生效；
+    # 回放与离线运行（进程环境中设置了 AI_TOWN_DISABLE_LLM）不读取 .env
+    llm_disabled = os.getenv("AI_TOWN_DISABLE_LLM", "0").lower() in ("1", "true", "yes")
+    if not args.replay and not llm_disabled:
+        from dotenv import load_dotenv
+
+        load_dotenv()
+
+    # 解析参数后再导入较重的依赖，使 --help 与参数错误能立即返回
+    from loguru import logger
+    from src.core.logger import LOG_FORMAT, LOG_EXTRA_DEFAULTS, get_log_filename
+    from src.gui.main_window import MainWindow
+
+    # 配置日志
+    logger.remove()
+    logger.configure(extra=LOG_EXTRA_DEFAULTS)
+    logger.add(sys.stderr, format=LOG_FORMAT, level="INFO")
+
     logger.info("Starting AI Town...")
     app = MainWindow(replay_log_path=args.replay)
     # Add file logger using the simulation start time so filenames are consistent
@@ -35,7 +46,14 @@ def main():
 
     # Ensure logs directory exists
     os.makedirs("logs", exist_ok=True)
-    logger.add(get_log_filename(session_start), format=loguru_formatter, level="DEBUG")
+    # 文件日志通过后台队列异步写入，并使用较大的写缓冲
+    logger.add(
+        get_log_filename(session_start),
+        format=LOG_FORMAT,
+        level="DEBUG",
+        enqueue=True,
+        buffering=8192,
+    )
     app.run()
 
 
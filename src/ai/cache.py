@@ -0,0 +1,368 @@
+"""
+LLM 响应缓存：精确匹配（SQLite 持久化）+ 语义相似度匹配
+"""
+
+import hashlib
+import os
+import sqlite3
+import threading
+import zlib
+from array import array
+from collections import OrderedDict
+from typing import Dict, Hashable, List, Optional, Tuple
+
+from loguru import logger
+
+from src.config import Config
+
+# 本地哈希向量维度
+EMBEDDING_DIM = 256
+
+
+def embed_text(text: str, dim: int = EMBEDDING_DIM) -> array:
+    """
+    计算文本的本地嵌入向量（字符三元组特征哈希，L2 归一化）。
+
+    不依赖任何模型，结果在不同进程间保持一致，便于持久化。
+    """
+    vec = [0.0] * dim
+    for i in range(max(1, len(text) - 2)):
+        bucket = zlib.crc32(text[i : i + 3].encode("utf-8"))
+        # 使用哈希的最高位决定符号，减少碰撞带来的偏差
+        vec[bucket % dim] += 1.0 if bucket & 0x80000000 else -1.0
+
+    norm = sum(v * v for v in vec) ** 0.5
+    if norm > 0:
+        vec = [v / norm for v in vec]
+    return array("f", vec)
+
+
+def normalize_prompt(text: str) -> str:
+    """缓存键用的提示词规范化：去掉首尾空白并把连续空白折叠为单个空格
+
+    只用于计算键与嵌入，发往模型的仍是原始提示词。
+    """
+    return " ".join(text.split())
+
+
+def _dot(a: array, b: array) -> int:
+    return sum(x * y for x, y in zip(a, b))
+
+
+def quantize(vec: array) -> Tuple[array, float]:
+    """
+    将嵌入向量量化为 int8，并返回量化后向量模长的倒数
+
+    内存占用为 float32 的四分之一；两个量化向量的点积乘以各自的系数即为余弦相似度，
+    与原始向量相比误差约在千分之一量级。
+    """
+    absmax = max(map(abs, vec), default=0.0)
+    if absmax == 0:
+        return array("b", bytes(len(vec))), 0.0
+    factor = 127 / absmax
+    quantized = array("b", [round(v * factor) for v in vec])
+    return quantized, 1.0 / _dot(quantized, quantized) ** 0.5
+
+
+def similarity(a: Tuple[array, float], b: Tuple[array, float]) -> float:
+    """两个 quantize 结果（int8 向量, 模长倒数）之间的余弦相似度"""
+    return _dot(a[0], b[0]) * a[1] * b[1]
+
+
+class SemanticCache:
+    """
+    两级 LLM 响应缓存：
+
+    1. 精确匹配：以规范化空白后的 (system_prompt, user_prompt, model, temperature)
+       的 BLAKE2b 摘要为键，内存中保留最近使用的条目（LRU），淘汰的条目回落到 SQLite 按键查询
+    2. 语义匹配（仅 semantic=True 的请求）：在系统提示词、模型、温度均相同的范围内，
+       对用户提示词的 int8 量化嵌入向量做余弦相似度搜索；
+       每个范围（系统提示词包含居民档案，约等于每个居民）只保留最近的 scope_maxsize 条
+    """
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        threshold: float = Config.CACHE_SIMILARITY_THRESHOLD,
+        maxsize: int = Config.CACHE_EXACT_MAXSIZE,
+        scope_maxsize: int = Config.CACHE_SEMANTIC_SCOPE_MAXSIZE,
+        persist_maxsize: int = Config.CACHE_PERSIST_MAXSIZE,
+    ):
+        self.path = path
+        self.threshold = threshold
+        self.maxsize = maxsize
+        self.scope_maxsize = scope_maxsize
+        self.persist_maxsize = persist_maxsize
+        self._lock = threading.Lock()
+        self._exact: "OrderedDict[str, str]" = OrderedDict()
+        # scope -> (int8 嵌入向量列表, 模长倒数列表, 响应列表)
+        self._vectors: Dict[str, Tuple[List[array], List[float], List[str]]] = {}
+        self._conn: Optional[sqlite3.Connection] = None
+        # 持久化存储中的条目数，超过 persist_maxsize 时按 rowid 删除最早的条目
+        self._rows = 0
+
+        if path:
+            self._open(path)
+
+    @staticmethod
+    def _hash(*parts: str) -> str:
+        return hashlib.blake2b(
+            "\0".join(parts).encode("utf-8"), digest_size=16
+        ).hexdigest()
+
+    def _open(self, path: str) -> None:
+        try:
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            self._conn = sqlite3.connect(path, check_same_thread=False)
+            # WAL 模式下写入不阻塞读取，且每次提交的 fsync 开销更小
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "key TEXT PRIMARY KEY, scope TEXT, prompt TEXT, response TEXT, "
+                "embedding BLOB, scale REAL)"
+            )
+            # 旧版本的缓存文件没有向量列，补上后旧条目在加载时现算
+            columns = {
+                row[1] for row in self._conn.execute("PRAGMA table_info(responses)")
+            }
+            for column, sql_type in (("embedding", "BLOB"), ("scale", "REAL")):
+                if column not in columns:
+                    self._conn.execute(
+                        f"ALTER TABLE responses ADD COLUMN {column} {sql_type}"
+                    )
+            # INSERT OR REPLACE 会分配新的 rowid，rowid 越大即写入越晚
+            self._conn.execute(
+                "DELETE FROM responses WHERE rowid NOT IN "
+                "(SELECT rowid FROM responses ORDER BY rowid DESC LIMIT ?)",
+                (self.persist_maxsize,),
+            )
+            self._conn.commit()
+            self._rows = self._conn.execute(
+                "SELECT COUNT(*) FROM responses"
+            ).fetchone()[0]
+            # 只加载最近写入的 maxsize 条，更早的条目留在磁盘上按键查询
+            rows = self._conn.execute(
+                "SELECT key, scope, prompt, response, embedding, scale FROM responses "
+                "ORDER BY rowid DESC LIMIT ?",
+                (self.maxsize,),
+            ).fetchall()
+            for key, scope, prompt, response, blob, scale in reversed(rows):
+                if blob == b"":
+                    # 只参与精确匹配的条目（JSON 输出）没有向量
+                    self._remember(key, response)
+                    continue
+                vector = None
+                if blob is not None and scale is not None:
+                    embedding = array("b")
+                    embedding.frombytes(blob)
+                    vector = (embedding, scale)
+                self._insert(key, scope, prompt, response, vector)
+            logger.info(
+                f"Loaded {len(rows)} of {self._rows} cached LLM responses from {path}"
+            )
+        except sqlite3.Error as e:
+            logger.error(f"Failed to open LLM cache {path}: {e}")
+            self._conn = None
+
+    def _remember(self, key: str, response: str) -> None:
+        self._exact[key] = response
+        self._exact.move_to_end(key)
+        if len(self._exact) > self.maxsize:
+            self._exact.popitem(last=False)
+
+    def _insert(
+        self,
+        key: str,
+        scope: str,
+        prompt: str,
+        response: str,
+        vector: Optional[Tuple[array, float]] = None,
+    ) -> Tuple[array, float]:
+        """写入内存索引；vector 为已量化的 (向量, 系数)，缺省时由 prompt 计算"""
+        self._remember(key, response)
+        embeddings, scales, responses = self._vectors.setdefault(scope, ([], [], []))
+        embedding, scale = vector or quantize(embed_text(prompt))
+        embeddings.append(embedding)
+        scales.append(scale)
+        responses.append(response)
+        if len(responses) > self.scope_maxsize:
+            # 淘汰该范围内最早写入的向量，限制每次语义搜索的扫描量
+            del embeddings[0], scales[0], responses[0]
+        return embedding, scale
+
+    def _lookup_persisted(self, key: str) -> Optional[str]:
+        """内存 LRU 未命中时按键查询持久化存储"""
+        if not self._conn or len(self._exact) < self.maxsize:
+            # 内存未满说明不曾淘汰过，无需查询磁盘
+            return None
+        try:
+            row = self._conn.execute(
+                "SELECT response FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+        except sqlite3.Error:
+            return None
+        if row is None:
+            return None
+        self._remember(key, row[0])
+        return row[0]
+
+    def get(
+        self,
+        system_prompt: str,
+        user_prompt: str,
+        model: str,
+        temperature: float,
+        semantic: bool = False,
+    ) -> Optional[str]:
+        """查找缓存的响应，未命中时返回 None
+
+        semantic 为 False 时只做精确匹配。规划、对话等 JSON 提示词中
+        日期、时间、位置只占很少的字符，语义匹配会把不同时刻的请求判为相同，
+        因此只有能接受近似答案的纯文本请求才开启语义匹配。
+        """
+        user_prompt = normalize_prompt(user_prompt)
+        scope = self._hash(normalize_prompt(system_prompt), model, str(temperature))
+        key = self._hash(scope, user_prompt)
+
+        with self._lock:
+            # 精确匹配快速路径
+            hit = self._exact.get(key)
+            if hit is None:
+                hit = self._lookup_persisted(key)
+            if hit is not None:
+                self._exact.move_to_end(key)
+                logger.debug("LLM cache hit [exact]")
+                return hit
+            if not semantic:
+                return None
+
+            entry = self._vectors.get(scope)
+            if not entry:
+                return None
+            # 复制快照，搜索期间其他线程的写入与淘汰不会错位
+            embeddings, scales, responses = (column[:] for column in entry)
+
+        query, query_scale = quantize(embed_text(user_prompt))
+        best_score, best_idx = -1.0, -1
+        for i, emb in enumerate(embeddings):
+            score = _dot(emb, query) * scales[i]
+            if score > best_score:
+                best_score, best_idx = score, i
+        best_score *= query_scale
+
+        if best_score >= self.threshold:
+            logger.debug(f"LLM cache hit [semantic, similarity={best_score:.3f}]")
+            return responses[best_idx]
+        return None
+
+    def put(
+        self,
+        system_prompt: str,
+        user_prompt: str,
+        model: str,
+        temperature: float,
+        response: str,
+        semantic: bool = False,
+    ) -> None:
+        """写入一条响应；semantic 为 False 时不建立向量索引，只供精确匹配"""
+        user_prompt = normalize_prompt(user_prompt)
+        scope = self._hash(normalize_prompt(system_prompt), model, str(temperature))
+        key = self._hash(scope, user_prompt)
+
+        with self._lock:
+            if key in self._exact or self._lookup_persisted(key) is not None:
+                return
+            if semantic:
+                embedding, scale = self._insert(key, scope, user_prompt, response)
+                blob = embedding.tobytes()
+            else:
+                self._remember(key, response)
+                blob, scale = b"", None
+            if self._conn:
+                try:
+                    # 量化向量随响应一起持久化，下次启动直接加载，无需重新计算嵌入
+                    self._conn.execute(
+                        "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?)",
+                        (key, scope, user_prompt, response, blob, scale),
+                    )
+                    self._rows += 1
+                    if self._rows > self.persist_maxsize:
+                        self._conn.execute(
+                            "DELETE FROM responses WHERE rowid IN "
+                            "(SELECT rowid FROM responses ORDER BY rowid LIMIT ?)",
+                            (self._rows - self.persist_maxsize,),
+                        )
+                        self._rows = self.persist_maxsize
+                    self._conn.commit()
+                except sqlite3.Error as e:
+                    logger.error(f"Failed to persist LLM cache entry: {e}")
+
+
+class StructuralCache:
+    """
+    GenCache 风格的结构化缓存：按 (模板 ID, 关键槽位) 索引响应
+
+    条目结构为 {template_id: {slot_key: {variant: response}}}，
+    其中 variant 是可离散化的易变槽位（如小时）。
+    - 完全命中：slot_key 与 variant 均相同
+    - 近似命中：slot_key 相同但 variant 不同，由调用方决定如何微调后复用
+
+    每个模板最多保留 maxsize 个 slot_key（LRU 淘汰）。
+    """
+
+    def __init__(self, maxsize: int = Config.STRUCTURAL_CACHE_MAXSIZE):
+        self.maxsize = maxsize
+        self._lock = threading.Lock()
+        self._entries: Dict[str, "OrderedDict[tuple, Dict[Hashable, str]]"] = {}
+
+    def get(
+        self, template_id: str, slot_key: tuple, variant: Hashable
+    ) -> Tuple[Optional[str], bool]:
+        """
+        查找缓存的响应
+
+        Returns:
+            (响应, 是否完全命中)；未命中时响应为 None
+        """
+        with self._lock:
+            slots = self._entries.get(template_id)
+            variants = slots.get(slot_key) if slots else None
+            if not variants:
+                return None, False
+            slots.move_to_end(slot_key)
+            if variant in variants:
+                return variants[variant], True
+            # 近似命中：取最近写入的变体
+            return next(reversed(variants.values())), False
+
+    def put(
+        self, template_id: str, slot_key: tuple, variant: Hashable, response: str
+    ) -> None:
+        with self._lock:
+            slots = self._entries.setdefault(template_id, OrderedDict())
+            slots.setdefault(slot_key, {})[variant] = response
+            slots.move_to_end(slot_key)
+            if len(slots) > self.maxsize:
+                slots.popitem(last=False)
+
+
+# 全局单例
+_response_cache = None
+_structural_cache = None
+
+
+def get_response_cache() -> SemanticCache:
+    """获取全局 LLM 响应缓存单例"""
+    global _response_cache
+    if _response_cache is None:
+        _response_cache = SemanticCache(path=os.path.expanduser(Config.CACHE_PATH))
+    return _response_cache
+
+
+def get_structural_cache() -> StructuralCache:
+    """获取全局结构化缓存单例"""
+    global _structural_cache
+    if _structural_cache is None:
+        _structural_cache = StructuralCache()
+    return _structural_cache
@@ -1,25 +1,142 @@
 import os
-from openai import OpenAI
-from dotenv import load_dotenv
+import json
+import asyncio
+import importlib.util
+from typing import (
+    AsyncIterator,
+    Dict,
+    Generator,
+    Hashable,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+)
 from loguru import logger
 
-load_dotenv()
+from src.config import Config
+from src.core import json_compat
+from src.ai.cache import get_response_cache, get_structural_cache
+from src.ai.prompts import (
+    PromptTemplate,
+    BATCH_SYSTEM_PROMPT_SUFFIX,
+    BATCH_REQUEST_ITEM,
+    RESPONSE_VARIATION_SYSTEM_PROMPT,
+    RESPONSE_VARIATION_USER_PROMPT,
+)
 
-# 将 socks:// 代理前缀替换为 socks5://，以兼容某些库要求
-for key in [
-    "HTTP_PROXY",
-    "HTTPS_PROXY",
-    "http_proxy",
-    "https_proxy",
-    "ALL_PROXY",
-    "all_proxy",
-]:
-    if os.environ.get(key, "").startswith("socks://"):
-        os.environ[key] = os.environ[key].replace("socks://", "socks5://")
+_environment_loaded = False
+_proxy_env_fixed = False
+
+# 本进程内已验证可用的 (base_url, api_key, model)，避免重复检查
+_verified_endpoints = set()
+
+# 所有 LLMClient 共用的 HTTP 连接池（同步、异步各一个），首次创建客户端时初始化
+_shared_http_client = None
+_shared_async_http_client = None
+
+
+def _load_environment() -> None:
+    """首次创建客户端时加载 .env，避免导入本模块时的开销"""
+    global _environment_loaded
+    if _environment_loaded:
+        return
+    _environment_loaded = True
+
+    from dotenv import load_dotenv
+
+    load_dotenv()
+
+
+def _fix_proxy_env() -> None:
+    """修正代理环境变量，仅在真正创建客户端时执行一次"""
+    global _proxy_env_fixed
+    if _proxy_env_fixed:
+        return
+    _proxy_env_fixed = True
+
+    # 将 socks:// 代理前缀替换为 socks5://，以兼容某些库要求
+
+    for key in [
+        "HTTP_PROXY",
+        "HTTPS_PROXY",
+        "http_proxy",
+        "https_proxy",
+        "ALL_PROXY",
+        "all_proxy",
+    ]:
+        if os.environ.get(key, "").startswith("socks://"):
+            os.environ[key] = os.environ[key].replace("socks://", "socks5://")
+
+
+def _http_client_options() -> dict:
+    """共享连接池参数：长连接复用，h2 可用时开启 HTTP/2 多路复用"""
+    import httpx
+
+    return {
+        "http2": Config.LLM_HTTP2 and importlib.util.find_spec("h2") is not None,
+        "limits": httpx.Limits(
+            max_connections=Config.LLM_MAX_CONNECTIONS,
+            max_keepalive_connections=Config.LLM_MAX_CONNECTIONS,
+        ),
+    }
+
+
+def _get_shared_http_clients():
+    """
+    返回进程内共享的 (同步, 异步) HTTP 客户端
+
+    默认客户端与每个居民自定义的客户端复用同一组长连接，连接池按目标地址区分，
+    指向同一服务的请求无需重新握手。
+    """
+    global _shared_http_client, _shared_async_http_client
+    if _shared_http_client is None:
+        from openai import DefaultHttpxClient, DefaultAsyncHttpxClient
+
+        _shared_http_client = DefaultHttpxClient(**_http_client_options())
+        _shared_async_http_client = DefaultAsyncHttpxClient(**_http_client_options())
+    return _shared_http_client, _shared_async_http_client
+
+
+def partial_json_string(buffer: str, field: str) -> Optional[str]:
+    """
+    从尚未接收完整的 JSON 文本中提取某个字符串字段的当前内容
+
+    用于流式输出时提前展示字段内容；字段尚未出现时返回 None。
+    """
+    key = buffer.find(f'"{field}"')
+    if key < 0:
+        return None
+    colon = buffer.find(":", key + len(field) + 2)
+    if colon < 0:
+        return None
+    start = buffer.find('"', colon + 1)
+    if start < 0:
+        return None
+
+    end = start + 1
+    while end < len(buffer):
+        if buffer[end] == "\\":
+            end += 2
+            continue
+        if buffer[end] == '"':
+            break
+        end += 1
+
+    raw = buffer[start + 1 : min(end, len(buffer))]
+    # 去掉末尾不完整的转义序列
+    if raw.endswith("\\") and not raw.endswith("\\\\"):
+        raw = raw[:-1]
+    try:
+        return json.loads(f'"{raw}"')
+    except json.JSONDecodeError:
+        return raw
 
 
 class LLMClient:
     def __init__(self, api_key=None, base_url=None, model=None, temperature=None):
+        if not Config.LLM_DISABLED:
+            _load_environment()
         self.api_key = api_key or os.getenv("OPENAI_API_KEY")
         self.base_url = base_url or os.getenv("OPENAI_BASE_URL")
         self.model = model or os.getenv("LLM_MODEL", "gpt-3.5-turbo")
@@ -29,13 +146,118 @@ class LLMClient:
             else float(os.getenv("LLM_TEMPERATURE", "0.7"))
         )
 
-        if not self.api_key:
+        if Config.LLM_DISABLED:
+            logger.info("LLM disabled by AI_TOWN_DISABLE_LLM.")
+            self.client = None
+            self.aclient = None
+        elif not self.api_key:
             logger.warning(
                 "OPENAI_API_KEY not found in environment variables. LLM features will not work."
             )
             self.client = None
+            self.aclient = None
         else:
-            self.client = OpenAI(api_key=self.api_key, base_url=self.base_url)
+            _fix_proxy_env()
+
+            # 仅在真正需要时导入 OpenAI SDK（回放模式用不到）
+            import httpx
+            from openai import OpenAI, AsyncOpenAI
+
+            http_client, async_http_client = _get_shared_http_clients()
+
+            self.client = OpenAI(
+                api_key=self.api_key,
+                base_url=self.base_url,
+                max_retries=Config.LLM_MAX_RETRIES,
+                timeout=httpx.Timeout(Config.LLM_TIMEOUT, connect=5.0),
+                http_client=http_client,
+            )
+            # 异步客户端用于并发规划；SDK 自带对 429/5xx 的指数退避重试
+            self.aclient = AsyncOpenAI(
+                api_key=self.api_key,
+                base_url=self.base_url,
+                max_retries=Config.LLM_MAX_RETRIES,
+                timeout=httpx.Timeout(Config.LLM_TIMEOUT, connect=5.0),
+                http_client=async_http_client,
+            )
+
+        # 限制同时在途的异步请求数，首次使用时创建
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        # 在途的 JSON 请求：(模型, 系统提示词, 上下文, 用户提示词) -> 结果
+        self._inflight: Dict[Tuple, asyncio.Future] = {}
+
+        self.cache = get_response_cache() if Config.CACHE_ENABLED else None
+        self.structural_cache = (
+            get_structural_cache() if Config.STRUCTURAL_CACHE_ENABLED else None
+        )
+
+    @staticmethod
+    def _messages(system_prompt: str, prompt: str, context: Optional[str]) -> list:
+        """
+        构建消息列表
+
+        静态的系统提示词放在第一条消息，居民相关的动态上下文单独成一条消息，
+        使所有请求共享尽可能长的前缀，便于命中服务端的提示词前缀缓存。
+        """
+        messages = [{"role": "system", "content": system_prompt}]
+        if context:
+            messages.append({"role": "system", "content": context})
+        messages.append({"role": "user", "content": prompt})
+        return messages
+
+    @staticmethod
+    def _cache_system(system_prompt: str, context: Optional[str]) -> str:
+        return f"{system_prompt}\n{context}" if context else system_prompt
+
+    def _cache_get(
+        self,
+        system_prompt: str,
+        context: Optional[str],
+        prompt: str,
+        model: str,
+        semantic: bool = False,
+    ) -> Optional[str]:
+        """查询响应缓存；未启用缓存或未命中时返回 None"""
+        if not self.cache:
+            return None
+        return self.cache.get(
+            self._cache_system(system_prompt, context),
+            prompt,
+            model,
+            self.temperature,
+            semantic=semantic,
+        )
+
+    def _cache_put(
+        self,
+        system_prompt: str,
+        context: Optional[str],
+        prompt: str,
+        model: str,
+        content: str,
+        semantic: bool = False,
+    ) -> None:
+        """写入响应缓存；未启用缓存时不做任何事"""
+        if self.cache:
+            self.cache.put(
+                self._cache_system(system_prompt, context),
+                prompt,
+                model,
+                self.temperature,
+                content,
+                semantic=semantic,
+            )
+
+    @staticmethod
+    def _log_usage(response) -> None:
+        """记录命中服务端前缀缓存的 token 数"""
+        usage = getattr(response, "usage", None)
+        details = getattr(usage, "prompt_tokens_details", None)
+        cached = getattr(details, "cached_tokens", None)
+        if cached is not None:
+            logger.debug(
+                f"LLM usage: prompt_tokens={usage.prompt_tokens}, cached_tokens={cached}"
+            )
 
     def check_connection(self):
         """检查 LLM 提供者是否可达并能正常工作。"""
@@ -44,70 +266,515 @@ class LLMClient:
                 "LLM Client is not initialized. Please check OPENAI_API_KEY."
             )
 
+        endpoint = (self.base_url, self.api_key, self.model)
+        if endpoint in _verified_endpoints:
+            return
+
+        from openai import APIStatusError
+
         try:
             logger.info(f"Checking LLM connection to {self.base_url or 'OpenAI'}...")
-            self.client.chat.completions.create(
-                model=self.model,
-                messages=[{"role": "user", "content": "ping"}],
-                max_tokens=1,
-            )
+            try:
+                # 优先使用不计费的 /models 接口
+                self.client.models.list()
+            except APIStatusError as e:
+                if e.status_code not in (404, 405, 501):
+                    raise
+                # 提供者不支持 /models 时回退到最小的补全请求
+                self.client.chat.completions.create(
+                    model=self.model,
+                    messages=[{"role": "user", "content": "ping"}],
+                    max_tokens=1,
+                )
             logger.info("LLM connection successful.")
         except Exception as e:
             raise ConnectionError(f"无法连接到 LLM 提供者: {e}")
+        _verified_endpoints.add(endpoint)
 
     def get_completion(
-        self, prompt: str, system_prompt: str = "You are a helpful assistant."
+        self,
+        prompt: str,
+        system_prompt: str = "You are a helpful assistant.",
+        context: Optional[str] = None,
     ) -> str:
         if not self.client:
             return "LLM 客户端未初始化。"
 
+        cached = self._cache_get(
+            system_prompt, context, prompt, self.model, semantic=True
+        )
+        if cached is not None:
+            return cached
+
         try:
             logger.debug(
-                f"LLM Request [Text]:\nSystem: {system_prompt}\nUser: {prompt}"
+                f"LLM Request [Text]:\nSystem: {system_prompt}\nContext: {context}\nUser: {prompt}"
             )
             response = self.client.chat.completions.create(
                 model=self.model,
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": prompt},
-                ],
+                messages=self._messages(system_prompt, prompt, context),
                 temperature=self.temperature,
                 stream=False,
             )
             content = response.choices[0].message.content.strip()
+            self._log_usage(response)
             logger.debug(f"LLM Response [Text]:\n{content}")
+            self._cache_put(
+                system_prompt, context, prompt, self.model, content, semantic=True
+            )
             return content
         except Exception as e:
             logger.error(f"调用 LLM 时出错: {e}")
             return f"Error: {e}"
 
+    def stream_completion(
+        self,
+        prompt: str,
+        system_prompt: str = "You are a helpful assistant.",
+        context: Optional[str] = None,
+        json_mode: bool = False,
+    ) -> Iterator[str]:
+        """
+        流式补全：逐段产出 LLM 返回的增量文本
+
+        json_mode 为 True 时与 get_json_completion 使用相同的提示词与输出格式，
+        调用方需自行拼接完整文本后再解析。
+        """
+        if not self.client:
+            return
+
+        if json_mode:
+            system_prompt = system_prompt + "\nRespond in JSON format."
+        cached = self._cache_get(
+            system_prompt, context, prompt, self.model, semantic=not json_mode
+        )
+        if cached is not None:
+            yield cached
+            return
+
+        kind = "JSON" if json_mode else "Text"
+        extra = {"response_format": {"type": "json_object"}} if json_mode else {}
+        try:
+            logger.debug(
+                f"LLM Request [{kind}, stream]:\nSystem: {system_prompt}\nContext: {context}\nUser: {prompt}"
+            )
+            stream = self.client.chat.completions.create(
+                model=self.model,
+                messages=self._messages(system_prompt, prompt, context),
+                temperature=self.temperature,
+                stream=True,
+                **extra,
+            )
+            parts = []
+            for chunk in stream:
+                if not chunk.choices:
+                    continue
+                delta = chunk.choices[0].delta.content
+                if delta:
+                    parts.append(delta)
+                    yield delta
+
+            content = "".join(parts).strip()
+            logger.debug(f"LLM Response [{kind}, stream]:\n{content}")
+            if content:
+                self._cache_put(
+                    system_prompt,
+                    context,
+                    prompt,
+                    self.model,
+                    content,
+                    semantic=not json_mode,
+                )
+        except Exception as e:
+            logger.error(f"Error streaming from LLM: {e}")
+
     def get_json_completion(
-        self, prompt: str, system_prompt: str = "You are a helpful assistant."
+        self,
+        prompt: str,
+        system_prompt: str = "You are a helpful assistant.",
+        context: Optional[str] = None,
+        model: str = None,
     ) -> str:
         # 针对结构化输出，可能希望强制 JSON 模式（如果支持），目前使用简单提示。
         if not self.client:
             return "{}"
 
+        model = model or self.model
+        system_prompt = system_prompt + "\nRespond in JSON format."
+        cached = self._cache_get(system_prompt, context, prompt, model)
+        if cached is not None:
+            return cached
+
         try:
             logger.debug(
-                f"LLM Request [JSON]:\nSystem: {system_prompt}\nUser: {prompt}"
+                f"LLM Request [JSON]:\nSystem: {system_prompt}\nContext: {context}\nUser: {prompt}"
             )
             response = self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {
-                        "role": "system",
-                        "content": system_prompt + "\nRespond in JSON format.",
-                    },
-                    {"role": "user", "content": prompt},
-                ],
+                model=model,
+                messages=self._messages(system_prompt, prompt, context),
                 response_format={"type": "json_object"},
                 temperature=self.temperature,
                 stream=False,
             )
             content = response.choices[0].message.content.strip()
+            self._log_usage(response)
+            logger.debug(f"LLM Response [JSON]:\n{content}")
+            self._cache_put(system_prompt, context, prompt, model, content)
+            return content
+        except Exception as e:
+            logger.error(f"Error calling LLM: {e}")
+            return "{}"
+
+    def get_json_completion_templated(
+        self,
+        template: PromptTemplate,
+        slots: dict,
+        system_prompt: str,
+        slot_key: tuple,
+        variant: Hashable,
+        context: Optional[str] = None,
+    ) -> str:
+        """
+        基于结构化缓存的 JSON 补全
+
+        - 完全命中 (slot_key 与 variant 相同)：直接返回缓存的响应
+        - 近似命中 (仅 variant 不同)：只让 LLM 重新生成模板的易变字段，
+          并合并回缓存的响应
+        - 未命中：完整调用 LLM，响应是非空 JSON 对象时写入缓存
+        """
+        steps = self._templated_steps(
+            template, slots, system_prompt, slot_key, variant, context, self.client
+        )
+        try:
+            request = next(steps)
+            while True:
+                request = steps.send(self.get_json_completion(**request))
+        except StopIteration as done:
+            return done.value
+
+    def _templated_steps(
+        self,
+        template: PromptTemplate,
+        slots: dict,
+        system_prompt: str,
+        slot_key: tuple,
+        variant: Hashable,
+        context: Optional[str],
+        client,
+    ) -> Generator[dict, str, str]:
+        """
+        结构化缓存的命中判断流程，同步与异步接口共用
+
+        逐个产出需要发出的 JSON 请求参数并接收其响应，最终返回补全结果；
+        调用方只负责以同步或异步方式发出请求。
+        """
+        request = {
+            "prompt": template.format(**slots),
+            "system_prompt": system_prompt,
+            "context": context,
+        }
+        if not self.structural_cache or not client:
+            return (yield request)
+
+        cache_id = f"{template.template_id}:{template.template_hash}"
+        cached, exact = self.structural_cache.get(cache_id, slot_key, variant)
+        if cached is not None and exact:
+            logger.debug(f"Structural cache hit [exact] for {template.template_id}")
+            return cached
+
+        if cached is not None and template.variable_fields:
+            logger.debug(f"Structural cache hit [near] for {template.template_id}")
+            variation_prompt, variation_system = self._variation_prompts(
+                template, slots, cached
+            )
+            varied = yield {
+                "prompt": variation_prompt,
+                "system_prompt": variation_system,
+                "model": Config.CACHE_VARIATION_MODEL,
+            }
+            content = self._merge_variation(template, cached, varied)
+            if content is not None:
+                self.structural_cache.put(cache_id, slot_key, variant, content)
+                return content
+
+        content = yield request
+        if self._json_object(content) is not None:
+            self.structural_cache.put(cache_id, slot_key, variant, content)
+        return content
+
+    @staticmethod
+    def _variation_prompts(
+        template: PromptTemplate, slots: dict, cached: str
+    ) -> Tuple[str, str]:
+        """构建近似命中时微调易变字段的 (用户提示词, 系统提示词)"""
+        context = "\n".join(
+            f"{name}: {slots[name]}" for name in template.context_slots if name in slots
+        )
+        return (
+            RESPONSE_VARIATION_USER_PROMPT.format(previous=cached, context=context),
+            RESPONSE_VARIATION_SYSTEM_PROMPT.format(
+                fields=", ".join(template.variable_fields)
+            ),
+        )
+
+    @staticmethod
+    def _json_object(content: str) -> Optional[dict]:
+        """将响应解析为非空 JSON 对象，解析失败或不是对象时返回 None"""
+        try:
+            parsed = json_compat.loads_object(content)
+        except ValueError:
+            return None
+        return parsed if isinstance(parsed, dict) and parsed else None
+
+    @classmethod
+    def _merge_variation(
+        cls, template: PromptTemplate, cached: str, response: str
+    ) -> Optional[str]:
+        """将 LLM 微调后的易变字段合并回缓存响应，失败时返回 None"""
+        previous = cls._json_object(cached)
+        varied = cls._json_object(response)
+        if not isinstance(previous, dict) or varied is None:
+            return None
+
+        for field in template.variable_fields:
+            if field in varied:
+                previous[field] = varied[field]
+        return json.dumps(previous, ensure_ascii=False)
+
+    # ---- 异步接口 ----
+
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(Config.LLM_MAX_CONCURRENCY)
+        return self._semaphore
+
+    async def aget_completion(
+        self,
+        prompt: str,
+        system_prompt: str = "You are a helpful assistant.",
+        context: Optional[str] = None,
+    ) -> str:
+        """get_completion 的异步版本"""
+        if not self.aclient:
+            return "LLM 客户端未初始化。"
+
+        cached = self._cache_get(
+            system_prompt, context, prompt, self.model, semantic=True
+        )
+        if cached is not None:
+            return cached
+
+        try:
+            logger.debug(
+                f"LLM Request [Text]:\nSystem: {system_prompt}\nContext: {context}\nUser: {prompt}"
+            )
+            async with self._get_semaphore():
+                response = await self.aclient.chat.completions.create(
+                    model=self.model,
+                    messages=self._messages(system_prompt, prompt, context),
+                    temperature=self.temperature,
+                    stream=False,
+                )
+            content = response.choices[0].message.content.strip()
+            self._log_usage(response)
+            logger.debug(f"LLM Response [Text]:\n{content}")
+            self._cache_put(
+                system_prompt, context, prompt, self.model, content, semantic=True
+            )
+            return content
+        except Exception as e:
+            logger.error(f"调用 LLM 时出错: {e}")
+            return f"Error: {e}"
+
+    async def astream_completion(
+        self,
+        prompt: str,
+        system_prompt: str = "You are a helpful assistant.",
+        context: Optional[str] = None,
+        json_mode: bool = False,
+    ) -> AsyncIterator[str]:
+        """stream_completion 的异步版本，整个流式响应期间占用一个并发名额"""
+        if not self.aclient:
+            return
+
+        if json_mode:
+            system_prompt = system_prompt + "\nRespond in JSON format."
+        cached = self._cache_get(
+            system_prompt, context, prompt, self.model, semantic=not json_mode
+        )
+        if cached is not None:
+            yield cached
+            return
+
+        kind = "JSON" if json_mode else "Text"
+        extra = {"response_format": {"type": "json_object"}} if json_mode else {}
+        try:
+            logger.debug(
+                f"LLM Request [{kind}, stream]:\nSystem: {system_prompt}\nContext: {context}\nUser: {prompt}"
+            )
+            parts = []
+            async with self._get_semaphore():
+                stream = await self.aclient.chat.completions.create(
+                    model=self.model,
+                    messages=self._messages(system_prompt, prompt, context),
+                    temperature=self.temperature,
+                    stream=True,
+                    **extra,
+                )
+                async for chunk in stream:
+                    if not chunk.choices:
+                        continue
+                    delta = chunk.choices[0].delta.content
+                    if delta:
+                        parts.append(delta)
+                        yield delta
+
+            content = "".join(parts).strip()
+            logger.debug(f"LLM Response [{kind}, stream]:\n{content}")
+            if content:
+                self._cache_put(
+                    system_prompt,
+                    context,
+                    prompt,
+                    self.model,
+                    content,
+                    semantic=not json_mode,
+                )
+        except Exception as e:
+            logger.error(f"Error streaming from LLM: {e}")
+
+    async def aget_json_completion(
+        self,
+        prompt: str,
+        system_prompt: str = "You are a helpful assistant.",
+        context: Optional[str] = None,
+        model: str = None,
+    ) -> str:
+        """get_json_completion 的异步版本"""
+        if not self.aclient:
+            return "{}"
+
+        model = model or self.model
+        system_prompt = system_prompt + "\nRespond in JSON format."
+        cached = self._cache_get(system_prompt, context, prompt, model)
+        if cached is not None:
+            return cached
+
+        # 合并完全相同的在途请求：后到者等待先发出的请求，不重复调用 LLM
+        key = (model, system_prompt, context, prompt)
+        pending = self._inflight.get(key)
+        if pending is not None:
+            logger.debug("Joining identical in-flight LLM request")
+            return await asyncio.shield(pending)
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        content = "{}"
+        try:
+            content = await self._acreate_json(prompt, system_prompt, context, model)
+        finally:
+            del self._inflight[key]
+            future.set_result(content)
+        return content
+
+    async def _acreate_json(
+        self, prompt: str, system_prompt: str, context: Optional[str], model: str
+    ) -> str:
+        """发出一次 JSON 模式的异步请求并写入响应缓存，出错时返回空 JSON 对象"""
+        try:
+            logger.debug(
+                f"LLM Request [JSON]:\nSystem: {system_prompt}\nContext: {context}\nUser: {prompt}"
+            )
+            async with self._get_semaphore():
+                response = await self.aclient.chat.completions.create(
+                    model=model,
+                    messages=self._messages(system_prompt, prompt, context),
+                    response_format={"type": "json_object"},
+                    temperature=self.temperature,
+                    stream=False,
+                )
+            content = response.choices[0].message.content.strip()
+            self._log_usage(response)
             logger.debug(f"LLM Response [JSON]:\n{content}")
+            self._cache_put(system_prompt, context, prompt, model, content)
             return content
         except Exception as e:
             logger.error(f"Error calling LLM: {e}")
             return "{}"
+
+    async def aget_json_completion_templated(
+        self,
+        template: PromptTemplate,
+        slots: dict,
+        system_prompt: str,
+        slot_key: tuple,
+        variant: Hashable,
+        context: Optional[str] = None,
+    ) -> str:
+        """get_json_completion_templated 的异步版本"""
+        steps = self._templated_steps(
+            template, slots, system_prompt, slot_key, variant, context, self.aclient
+        )
+        try:
+            request = next(steps)
+            while True:
+                request = steps.send(await self.aget_json_completion(**request))
+        except StopIteration as done:
+            return done.value
+
+    async def get_completion_many(
+        self, items: List[Tuple[str, str]], json_mode: bool = False
+    ) -> List[str]:
+        """
+        并发发起多个补全请求
+
+        Args:
+            items: (prompt, system_prompt) 列表
+            json_mode: 是否使用 JSON 输出模式
+
+        Returns:
+            与 items 顺序一一对应的响应列表
+        """
+        complete = self.aget_json_completion if json_mode else self.aget_completion
+        return list(
+            await asyncio.gather(
+                *(complete(prompt, system_prompt) for prompt, system_prompt in items)
+            )
+        )
+
+    async def aget_json_completions_batched(
+        self, prompts: List[str], system_prompt: str
+    ) -> List[Optional[str]]:
+        """
+        将多个共享同一系统提示词的 JSON 请求打包为一次调用
+
+        Returns:
+            与 prompts 顺序一一对应的 JSON 字符串；响应无法解析或缺失的项为 None，
+            调用方应对这些项逐个回退到普通请求
+        """
+        batch_system = system_prompt + BATCH_SYSTEM_PROMPT_SUFFIX.format(
+            count=len(prompts), last=len(prompts) - 1
+        )
+        batch_prompt = "".join(
+            BATCH_REQUEST_ITEM.format(index=i, prompt=prompt)
+            for i, prompt in enumerate(prompts)
+        )
+        response = await self.aget_json_completion(
+            batch_prompt, system_prompt=batch_system
+        )
+
+        results: List[Optional[str]] = [None] * len(prompts)
+        try:
+            entries = json_compat.loads(response).get("results", [])
+        except (json.JSONDecodeError, AttributeError):
+            logger.warning("Failed to parse batched LLM response, falling back")
+            return results
+
+        for entry in entries:
+            if not isinstance(entry, dict):
+                continue
+            index = entry.get("index")
+            if isinstance(index, int) and 0 <= index < len(prompts):
+                if isinstance(entry.get("response"), dict):
+                    results[index] = json.dumps(entry["response"], ensure_ascii=False)
+        return results
@@ -2,16 +2,86 @@
 LLM 提示词：使用规范 ID 来避免名称混淆问题
 """
 
-# 规划系统提示词
-PLANNING_SYSTEM_PROMPT = """
-You are {name} (ID: {char_id}).
+import hashlib
+import keyword
+import string
+import sys
+from functools import lru_cache
+from typing import Callable, Optional, Tuple
 
-Your Profile:
-Age: {age}
-Occupation: {occupation}
-Personality: {personality}
-Features: {features}
-Relationships: {relationships}
+
+class PromptTemplate:
+    """
+    提示词模板：记录模板 ID 与内容哈希，供结构化缓存识别同一模板的不同实例
+
+    Args:
+        template_id: 模板的唯一标识
+        text: 使用 str.format 占位符的模板文本
+        variable_fields: 结构化缓存近似命中时需要重新生成的响应字段
+        context_slots: 重新生成这些字段时提供给 LLM 的槽位
+    """
+
+    def __init__(
+        self,
+        template_id: str,
+        text: str,
+        variable_fields: Tuple[str, ...] = (),
+        context_slots: Tuple[str, ...] = (),
+    ):
+        self.template_id = template_id
+        self.text = text
+        self.template_hash = hashlib.sha1(text.encode("utf-8")).hexdigest()[:12]
+        self.variable_fields = variable_fields
+        self.context_slots = context_slots
+        self._render = _compile_template(text)
+
+    def format(self, **slots) -> str:
+        if self._render is None:
+            return self.text.format(**slots)
+        return self._render(**slots)
+
+
+def _compile_template(text: str) -> Optional[Callable[..., str]]:
+    """
+    把只含 {name} 占位符的模板编译为等价的 f-string 函数
+
+    省去 str.format 每次调用时解析模板与查找参数字典的开销；
+    含格式说明、转换、属性访问或位置参数的模板返回 None，回退到 str.format。
+    """
+    source = []
+    names = []
+    for literal, name, spec, conversion in string.Formatter().parse(text):
+        source.append(literal.replace("{", "{{").replace("}", "}}"))
+        if name is None:
+            continue
+        if (
+            spec
+            or conversion
+            or not name.isidentifier()
+            or keyword.iskeyword(name)
+            or name.startswith("_")
+        ):
+            return None
+        source.append("{" + name + "}")
+        if name not in names:
+            names.append(name)
+
+    # 仅接受关键字参数，与 str.format 一样忽略多余的槽位
+    params = "".join(f"{name}, " for name in names)
+    if names:
+        params = "*, " + params
+    namespace = {}
+    exec(f"def _render({params}**_):\n    return f{''.join(source)!r}", namespace)
+    return namespace["_render"]
+
+
+# 规划系统提示词
+# 静态部分（规则、动作、地点、输出格式）对所有居民相同，放在最前面以便命中服务端的前缀缓存；
+# 每个居民各自的档案放在单独的上下文消息中（跨 tick 不变），实时信息放在用户消息中
+PLANNING_SYSTEM_PROMPT = PromptTemplate(
+    "planning_system",
+    """
+You are a resident of a small town, planning your next action.
 
 Global Rules:
 1. Your goal is to live your life according to your personality and role.
@@ -33,9 +103,6 @@ Available Actions (use ID for action):
 Available Locations (use ID for target_location):
 {locations}
 
-Other Characters' Locations (reference characters by their names, not IDs):
-{other_characters_locations}
-
 Output Format:
 JSON object with the following fields:
 - "action": The action ID (e.g., "act_move", "act_chat", "act_sleep").
@@ -45,33 +112,49 @@ JSON object with the following fields:
   * For all other actions: A short sentence you might say to yourself or others (in Simplified Chinese).
 - "emoji": A single emoji that best represents your current action (e.g., "🍺", "💤", "🚶", "🍳").
 - "duration": Estimated duration in minutes. The minimum value is 10. IMPORTANT: Use short durations (10-20) for social events/waiting; use long durations (e.g. 480) only for sleeping or long work shifts.
-"""
+""",
+)
+
+PLANNING_CONTEXT_PROMPT = PromptTemplate(
+    "planning_context",
+    """
+--- Dynamic ---
+You are {name} (ID: {char_id}).
+
+Your Profile:
+Age: {age}
+Occupation: {occupation}
+Personality: {personality}
+Features: {features}
+Relationships: {relationships}
+""",
+)
 
-PLANNING_USER_PROMPT = """
+PLANNING_USER_PROMPT = PromptTemplate(
+    "planning_user",
+    """
 Current Status:
 Date: {date}
 Time: {time}
 Location: {location} (ID: {location_id})
 
+Other Characters' Locations (reference characters by their names, not IDs):
+{other_characters_locations}
+
 Your Memories/Goals:
 {memory}
 
 Please plan your next action.
-"""
+""",
+    variable_fields=("dialogue", "duration"),
+    context_slots=("date", "time", "location"),
+)
 
 # 对话系统提示词
-DIALOGUE_SYSTEM_PROMPT = """
-You are {name} (ID: {char_id}).
-
-Your Profile:
-Personality: {personality}
-Relationships: {relationships}
-
-Available Locations (for context):
-{locations}
-
-Other Characters' Locations (for context):
-{other_characters_locations}
+DIALOGUE_SYSTEM_PROMPT = PromptTemplate(
+    "dialogue_system",
+    """
+You are a resident of a small town, talking with another resident.
 
 Global Rules:
 1. Output must be in JSON format.
@@ -79,14 +162,35 @@ Global Rules:
 3. Be natural and conversational. Respond based on your personality and relationships.
 4. Your response should feel like a genuine dialogue, not overly formal.
 5. Keep responses concise (1-3 sentences typically).
-"""
 
-DIALOGUE_USER_PROMPT = """
+Available Locations (for context):
+{locations}
+""",
+)
+
+DIALOGUE_CONTEXT_PROMPT = PromptTemplate(
+    "dialogue_context",
+    """
+--- Dynamic ---
+You are {name} (ID: {char_id}).
+
+Your Profile:
+Personality: {personality}
+Relationships: {relationships}
+""",
+)
+
+DIALOGUE_USER_PROMPT = PromptTemplate(
+    "dialogue_user",
+    """
 Current Status:
 Date: {date}
 Time: {time}
 Location: {location} (ID: {location_id})
 
+Other Characters' Locations (for context):
+{other_characters_locations}
+
 Conversation Context:
 You met {target_name} at {location}. {context}
 
@@ -94,11 +198,62 @@ Your Memories:
 {memory}
 
 Please respond naturally and conversationally. Output your response in JSON with a single "content" field.
-"""
+""",
+)
+
+# 合并对话：一次请求生成两人各自的一句发言（C1 先说，C2 回复）
+DIALOGUE_PAIR_SYSTEM_PROMPT = PromptTemplate(
+    "dialogue_pair_system",
+    """
+You are writing a short exchange between two residents of a small town who just met.
+
+Global Rules:
+1. Output must be in JSON format.
+2. The first speaker ("c1") speaks first; the second speaker ("c2") replies to what "c1" said.
+3. Each "content" field must be in Simplified Chinese - what that resident says in this conversation.
+4. Be natural and conversational. Each resident responds based on their own personality, relationships and memories.
+5. Each response should feel like a genuine dialogue, not overly formal.
+6. Keep each response concise (1-3 sentences typically).
+
+Available Locations (for context):
+{locations}
+
+Output Format:
+JSON object of the form {{"c1": {{"content": "..."}}, "c2": {{"content": "..."}}}}.
+""",
+)
+
+DIALOGUE_PAIR_SPEAKER_PROMPT = PromptTemplate(
+    "dialogue_pair_speaker",
+    """
+Speaker "{role}": {name} (ID: {char_id})
+Personality: {personality}
+Relationships: {relationships}
+Memories:
+{memory}
+""",
+)
+
+DIALOGUE_PAIR_USER_PROMPT = PromptTemplate(
+    "dialogue_pair_user",
+    """
+Current Status:
+Date: {date}
+Time: {time}
+Location: {location} (ID: {location_id})
+
+Other Characters' Locations (for context):
+{other_characters_locations}
+{c1}{c2}
+Please write what "c1" says first and how "c2" replies.
+""",
+)
 
 # 记忆优化提示词
-MEMORY_OPTIMIZATION_SYSTEM_PROMPT = """
-You are {name}, performing a personal memory review at the end of the day.
+MEMORY_OPTIMIZATION_SYSTEM_PROMPT = PromptTemplate(
+    "memory_optimization_system",
+    """
+You are a town resident, performing a personal memory review at the end of the day.
 
 Rules for Memory Summary (IMPORTANT):
 1. Write in FIRST PERSON (I did, I felt, I learned, etc.) - these are YOUR memories.
@@ -108,13 +263,102 @@ Rules for Memory Summary (IMPORTANT):
 5. MUST Write concisely in English (4-6 sentences max). Focus on what matters: goals, facts, relationships, and intentions.
 6. If memories conflict, keep the most recent version.
 7. Do not narrate; just record key events and their impact on your goals.
-"""
+""",
+)
 
-MEMORY_OPTIMIZATION_USER_PROMPT = """
+MEMORY_OPTIMIZATION_CONTEXT_PROMPT = PromptTemplate(
+    "memory_optimization_context",
+    """
+--- Dynamic ---
+You are {name}.
+""",
+)
+
+MEMORY_OPTIMIZATION_USER_PROMPT = PromptTemplate(
+    "memory_optimization_user",
+    """
 Today's Date: {date}
 
 My memory entries from today:
 {memories}
 
 Please write a concise first-person summary of today (in English) that preserves the most important facts, relationships, decisions, and goals. Use specific times and dates whenever possible.
+""",
+)
+
+MEMORY_COMPACTION_SYSTEM_PROMPT = PromptTemplate(
+    "memory_compaction_system",
+    """
+You are a town resident, condensing a block of your earlier memories so you can keep them in mind for the rest of the day.
+
+Rules for Memento (IMPORTANT):
+1. Write in FIRST PERSON (I did, I felt, I learned, etc.) - these are YOUR memories.
+2. Keep the facts, people, promises, and plans that still matter; drop small talk and repetition.
+3. Keep specific times and dates exactly as they appear in the entries.
+4. MUST Write concisely in English (2-3 sentences max).
+""",
+)
+
+MEMORY_COMPACTION_USER_PROMPT = PromptTemplate(
+    "memory_compaction_user",
+    """
+Today's Date: {date}
+
+A block of my earlier memory entries:
+{memories}
+
+Please condense these entries into one short first-person memento (in English).
+""",
+)
+
+# 结构化缓存近似命中时，用于微调已有响应的提示词
+RESPONSE_VARIATION_SYSTEM_PROMPT = """
+You are adapting a previously generated JSON response to a slightly different situation.
+
+Rules:
+1. Output must be a JSON object containing ONLY these fields: {fields}.
+2. Keep the intent of the previous response; only adjust the values so they fit the current situation.
+3. Keep each field in the same language and format as in the previous response.
 """
+
+RESPONSE_VARIATION_USER_PROMPT = """
+Previous response:
+{previous}
+
+Current situation:
+{context}
+
+Please output the adjusted fields.
+"""
+
+# 批量规划：将多个相互独立的请求合并到一次调用中
+BATCH_SYSTEM_PROMPT_SUFFIX = """
+Batch Mode:
+You will receive {count} independent requests, labelled [0] to [{last}]. Each request describes a different person; answer each one independently, as if it were the only request, following all rules above.
+Output a single JSON object of the form {{"results": [{{"index": 0, "response": {{...}}}}, ...]}} with exactly one entry per request, where "response" is the JSON object you would have returned for that request alone.
+"""
+
+BATCH_REQUEST_ITEM = """
+=== Request [{index}] ===
+{prompt}
+"""
+
+
+@lru_cache(maxsize=8)
+def build_static_planning_system(actions_block: str, locations_block: str) -> str:
+    """渲染规划系统提示词；动作与地点表格不变时直接复用同一字符串"""
+    return sys.intern(
+        PLANNING_SYSTEM_PROMPT.format(actions=actions_block, locations=locations_block)
+    )
+
+
+@lru_cache(maxsize=8)
+def build_static_dialogue_system(locations_block: str) -> str:
+    """渲染对话系统提示词；地点表格不变时直接复用同一字符串"""
+    return sys.intern(DIALOGUE_SYSTEM_PROMPT.format(locations=locations_block))
+
+
+@lru_cache(maxsize=8)
+def build_static_dialogue_pair_system(locations_block: str) -> str:
+    """渲染合并对话系统提示词；地点表格不变时直接复用同一字符串"""
+    return sys.intern(DIALOGUE_PAIR_SYSTEM_PROMPT.format(locations=locations_block))
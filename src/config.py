@@ -26,3 +26,86 @@ class Config:
 
     # 如果规划失败，重试的延迟时间（游戏分钟）
     PLANNING_RETRY_DELAY = int(os.getenv("PLANNING_RETRY_DELAY", 15))
+
+    # 每个居民最多保留的原始记忆条数，超出时丢弃最旧的原始记忆（限制提示词长度）；
+    # 总结、备忘与任务记忆不计入上限
+    MEMORY_MAX = int(os.getenv("MEMORY_MAX", 100))
+
+    # 新记忆与最近若干条记忆（去掉时间戳后）相同或相似度不低于该阈值时不再记录；
+    # 设为大于 1 的值只去除完全相同的记忆
+    MEMORY_DEDUP_SIMILARITY = float(os.getenv("MEMORY_DEDUP_SIMILARITY", 0.97))
+
+    # 去重时比较的最近记忆条数
+    MEMORY_DEDUP_WINDOW = int(os.getenv("MEMORY_DEDUP_WINDOW", 32))
+
+    # 当天未总结的记忆超过该条数时，在白天提前压缩最早的一段
+    MEMORY_COMPACT_THRESHOLD = int(os.getenv("MEMORY_COMPACT_THRESHOLD", 40))
+
+    # 每次压缩为一条备忘的记忆条数
+    MEMORY_COMPACT_BLOCK = int(os.getenv("MEMORY_COMPACT_BLOCK", 20))
+
+    # 是否启用 LLM 响应缓存（精确匹配 + 语义匹配）
+    CACHE_ENABLED = os.getenv("CACHE_ENABLED", "0").lower() in ("1", "true", "yes")
+
+    # 语义缓存命中所需的最小余弦相似度（[0.0, 1.0]），仅对纯文本请求生效
+    CACHE_SIMILARITY_THRESHOLD = float(os.getenv("CACHE_SIMILARITY_THRESHOLD", 0.92))
+
+    # LLM 响应缓存的持久化文件
+    CACHE_PATH = os.getenv("CACHE_PATH", "~/.cache/ai_town/llm_cache.sqlite")
+
+    # 内存中精确匹配缓存的最大条目数（LRU 淘汰，淘汰后仍可从持久化存储命中）
+    CACHE_EXACT_MAXSIZE = int(os.getenv("CACHE_EXACT_MAXSIZE", 4096))
+
+    # 持久化存储保留的最大条目数，超出时删除最早写入的条目
+    CACHE_PERSIST_MAXSIZE = int(os.getenv("CACHE_PERSIST_MAXSIZE", 65536))
+
+    # 每个语义匹配范围（同一系统提示词、模型与温度）保留的最大向量条数
+    CACHE_SEMANTIC_SCOPE_MAXSIZE = int(os.getenv("CACHE_SEMANTIC_SCOPE_MAXSIZE", 128))
+
+    # 是否启用规划提示词的结构化缓存（按角色、地点、小时复用规划结果）
+    STRUCTURAL_CACHE_ENABLED = os.getenv("STRUCTURAL_CACHE_ENABLED", "0").lower() in (
+        "1",
+        "true",
+        "yes",
+    )
+
+    # 结构化缓存保留的最大关键槽位数（LRU 淘汰；记忆每次变化都会产生新槽位）
+    STRUCTURAL_CACHE_MAXSIZE = int(os.getenv("STRUCTURAL_CACHE_MAXSIZE", 1024))
+
+    # 结构化缓存近似命中时用于微调响应的模型（为空则使用默认模型）
+    CACHE_VARIATION_MODEL = os.getenv("CACHE_VARIATION_MODEL")
+
+    # 完全禁用 LLM（离线运行）：不加载 .env、不修改代理变量、不创建客户端
+    LLM_DISABLED = os.getenv("AI_TOWN_DISABLE_LLM", "0").lower() in ("1", "true", "yes")
+
+    # 同一 LLM 客户端同时在途的最大异步请求数
+    LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", 8))
+
+    # LLM 请求遇到限流或服务端错误时的最大重试次数（指数退避）
+    LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", 3))
+
+    # LLM 请求是否启用 HTTP/2（需要安装 h2，未安装时自动回退到 HTTP/1.1）
+    LLM_HTTP2 = os.getenv("LLM_HTTP2", "1").lower() in ("1", "true", "yes")
+
+    # 每个 LLM 客户端连接池的最大连接数（同时作为长连接保活数）
+    LLM_MAX_CONNECTIONS = int(os.getenv("LLM_MAX_CONNECTIONS", 64))
+
+    # 单次 LLM 请求超时（秒）
+    LLM_TIMEOUT = float(os.getenv("LLM_TIMEOUT", 60.0))
+
+    # 是否将同一 tick 内多个居民的规划合并为一次 LLM 请求
+    PLANNING_BATCH_ENABLED = os.getenv("PLANNING_BATCH_ENABLED", "0").lower() in (
+        "1",
+        "true",
+        "yes",
+    )
+
+    # 是否用一次 LLM 请求同时生成对话双方的发言（响应无法解析时回退为两次请求）
+    FUSED_DIALOGUE_ENABLED = os.getenv("FUSED_DIALOGUE_ENABLED", "0").lower() in (
+        "1",
+        "true",
+        "yes",
+    )
+
+    # 触发批量规划所需的最少居民数
+    PLANNING_BATCH_MIN_SIZE = int(os.getenv("PLANNING_BATCH_MIN_SIZE", 3))
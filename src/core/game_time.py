@@ -1,34 +1,69 @@
 from datetime import datetime, timedelta
 
+WEEKDAYS = ("周一", "周二", "周三", "周四", "周五", "周六", "周日")
+
 
 class GameTime:
     def __init__(self, start_year=2025, start_month=1, start_day=1, start_hour=6):
         self.current_time = datetime(start_year, start_month, start_day, start_hour, 0)
         self.day_count = 1
+        # 整数游戏分钟的起点，以及 minutes 属性的缓存
+        self._epoch = self.current_time
+        self._minutes = (self.current_time, 0)
+        # 派生字符串缓存 (时间, {键: 字符串})：current_time 变化（tick 或外部直接赋值）后失效。
+        # 时间与字典放在同一个元组里整体替换，GUI 线程与模拟线程并发读取时不会错配
+        self._cache = (None, {})
 
     def tick(self, minutes=3):
         self.current_time += timedelta(minutes=minutes)
 
+    @property
+    def minutes(self) -> int:
+        """
+        自开始以来经过的游戏分钟数
+
+        忙碌截止与交互冷却以整数分钟存储和比较，不必构造 datetime 与 timedelta。
+        current_time 改变后（tick 或外部直接赋值）首次访问时重新计算。
+        """
+        t = self.current_time
+        cache_time, minutes = self._minutes
+        if t is not cache_time:
+            minutes = (t - self._epoch) // timedelta(minutes=1)
+            self._minutes = (t, minutes)
+        return minutes
+
     @property
     def is_night(self):
         return self.current_time.hour >= 22 or self.current_time.hour < 6
 
     def __str__(self):
-        return self.current_time.strftime("%Y-%m-%d %H:%M")
+        return self.get_full_timestamp()
+
+    def _cached(self, key, build):
+        t = self.current_time
+        cache_time, cache = self._cache
+        if cache_time != t:
+            cache = {}
+            self._cache = (t, cache)
+        value = cache.get(key)
+        if value is None:
+            value = cache[key] = build(t)
+        return value
 
     def get_time_string(self):
-        return self.current_time.strftime("%H:%M")
+        return self._cached("time", lambda t: t.strftime("%H:%M"))
 
     def get_day_string(self):
-        weekdays = ["周一", "周二", "周三", "周四", "周五", "周六", "周日"]
-        wd = weekdays[self.current_time.weekday()]
-        return f"{self.current_time.strftime('%Y年%m月%d日')} {wd}"
+        return self._cached(
+            "day", lambda t: f"{t.strftime('%Y年%m月%d日')} {WEEKDAYS[t.weekday()]}"
+        )
 
     def get_full_timestamp(self):
-        return self.current_time.strftime("%Y-%m-%d %H:%M")
+        return self._cached("full", lambda t: t.strftime("%Y-%m-%d %H:%M"))
 
     def get_display_string(self):
         """Return formatted time string with weekday for GUI display"""
-        weekdays = ["周一", "周二", "周三", "周四", "周五", "周六", "周日"]
-        wd = weekdays[self.current_time.weekday()]
-        return f"{self.current_time.strftime('%Y-%m-%d')} {wd} {self.current_time.strftime('%H:%M')}"
+        return self._cached(
+            "display",
+            lambda t: f"{t.strftime('%Y-%m-%d')} {WEEKDAYS[t.weekday()]} {t.strftime('%H:%M')}",
+        )
@@ -4,6 +4,7 @@ ID 映射器：管理规范化 ID 与中文名称之间的双向映射。
 """
 
 import re
+import sys
 from typing import Dict, List, Optional, Tuple
 from dataclasses import dataclass
 
@@ -17,194 +18,206 @@ class IDMapping:
     en_name: str
 
 
-class CharacterIDMapper:
-    """角色 ID 映射器"""
+def _compile_id_pattern(ids) -> Optional[re.Pattern]:
+    """
+    将所有 ID 编译为单个交替正则，匹配 {{id}} 或 [id] 两种引用格式
 
-    PREFIX = "char"
+    较长的 ID 排在前面，避免前缀相同的 ID 被提前匹配。
+    """
+    if not ids:
+        return None
+    alternation = "|".join(map(re.escape, sorted(ids, key=len, reverse=True)))
+    return re.compile(rf"\{{\{{\s*({alternation})\s*\}}\}}|\[\s*({alternation})\s*\]")
 
-    def __init__(self):
-        self.id_to_zh: Dict[str, str] = {}  # char_abigail -> 阿比盖尔
-        self.zh_to_id: Dict[str, str] = {}  # 阿比盖尔 -> char_abigail
-        self.id_to_en: Dict[str, str] = {}  # char_abigail -> Abigail
 
-    def register(self, canonical_id: str, zh_name: str, en_name: str) -> None:
-        """注册角色 ID 映射"""
+def _normalize_ids(
+    text: str, pattern: Optional[re.Pattern], id_to_zh: Dict[str, str]
+) -> str:
+    """单次扫描将文本中的 ID 引用替换为中文名称"""
+    if pattern is None or ("{{" not in text and "[" not in text):
+        return text
+    return pattern.sub(lambda m: id_to_zh[m.group(1) or m.group(2)], text)
+
+
+def _id_to_zh(records: List[IDMapping]) -> Dict[str, str]:
+    return {r.canonical_id: r.zh_name for r in records}
+
+
+class _IDMapperBase:
+    """
+    ID 映射器公共实现
+
+    所有映射记录集中存放在 _records 列表中，按 ID / 中文名 / 英文名
+    建立指向列表下标的索引，避免同一字符串在多个字典中重复存放。
+    注册时对字符串做 sys.intern，后续查找可直接命中指针比较。
+    """
+
+    PREFIX = ""
+    KIND = ""
+
+    def __init__(self):
+        self._records: List[IDMapping] = []
+        self._by_id: Dict[str, int] = {}  # char_abigail -> 下标
+        self._by_zh: Dict[str, int] = {}  # 阿比盖尔 -> 下标
+        self._by_en: Dict[str, int] = {}  # Abigail -> 下标
+        # 注册新 ID 后按需重建的替换正则与 ID -> 中文名表
+        self._pattern: Optional[re.Pattern] = None
+        self._id_to_zh: Optional[Dict[str, str]] = None
+        # 已注册 ID / 中文名 -> 显示名称，注册新映射时清空
+        self._display: Dict[str, str] = {}
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    @property
+    def records(self) -> List[IDMapping]:
+        """按注册顺序排列的全部映射记录（只读使用）"""
+        return self._records
+
+    def _check_prefix(self, canonical_id: str) -> None:
         if not canonical_id.startswith(f"{self.PREFIX}_"):
             raise ValueError(
-                f"角色 ID 必须以 '{self.PREFIX}_' 开头，收到: {canonical_id}"
+                f"{self.KIND} ID 必须以 '{self.PREFIX}_' 开头，收到: {canonical_id}"
             )
 
-        # 验证唯一性
-        if canonical_id in self.id_to_zh:
-            raise ValueError(f"角色 ID 已存在: {canonical_id}")
-        if zh_name in self.zh_to_id:
-            raise ValueError(f"中文名称已存在: {zh_name}")
-
-        self.id_to_zh[canonical_id] = zh_name
-        self.zh_to_id[zh_name] = canonical_id
-        self.id_to_en[canonical_id] = en_name
+    def _store(self, canonical_id: str, zh_name: str, en_name: str) -> None:
+        record = IDMapping(
+            sys.intern(canonical_id), sys.intern(zh_name), sys.intern(en_name)
+        )
+        index = self._by_id.get(record.canonical_id)
+        if index is None:
+            index = len(self._records)
+            self._records.append(record)
+        else:
+            self._records[index] = record
+        self._by_id[record.canonical_id] = index
+        self._by_zh[record.zh_name] = index
+        self._by_en[record.en_name] = index
+        self._pattern = None
+        self._id_to_zh = None
+        self._display.clear()
 
     def get_id_from_zh(self, zh_name: str) -> Optional[str]:
         """从中文名称获取规范 ID"""
-        return self.zh_to_id.get(zh_name)
+        index = self._by_zh.get(zh_name)
+        return None if index is None else self._records[index].canonical_id
 
     def get_zh_from_id(self, canonical_id: str) -> Optional[str]:
         """从规范 ID 获取中文名称"""
-        return self.id_to_zh.get(canonical_id)
+        index = self._by_id.get(canonical_id)
+        return None if index is None else self._records[index].zh_name
 
     def get_en_from_id(self, canonical_id: str) -> Optional[str]:
         """从规范 ID 获取英文名称"""
-        return self.id_to_en.get(canonical_id)
+        index = self._by_id.get(canonical_id)
+        return None if index is None else self._records[index].en_name
 
     def get_display_name(self, identifier: str) -> str:
         """获取显示名称（支持 ID 或中文名称作为输入）"""
+        cached = self._display.get(identifier)
+        if cached is not None:
+            return cached
+
         # 如果输入是 ID
         if identifier.startswith(f"{self.PREFIX}_"):
-            zh = self.get_zh_from_id(identifier)
-            en = self.get_en_from_id(identifier)
-            if zh and en:
-                return f"{en} ({zh})"
-            return identifier
-
-        # 如果输入是中文名称
-        zh_name = identifier
-        char_id = self.get_id_from_zh(zh_name)
-        if char_id:
-            en = self.get_en_from_id(char_id)
-            if en:
-                return f"{en} ({zh_name})"
+            index = self._by_id.get(identifier)
+            if index is None:
+                return identifier
+            record = self._records[index]
+            display = (
+                f"{record.en_name} ({record.zh_name})"
+                if record.zh_name and record.en_name
+                else identifier
+            )
+        else:
+            # 如果输入是中文名称
+            index = self._by_zh.get(identifier)
+            if index is None:
+                return identifier
+            en_name = self._records[index].en_name
+            display = f"{en_name} ({identifier})" if en_name else identifier
+
+        # 只缓存已注册的名称，LLM 返回的任意文本不会让缓存无限增长
+        self._display[identifier] = display
+        return display
+
+    def _normalize(self, text: str) -> str:
+        if self._id_to_zh is None:
+            self._id_to_zh = _id_to_zh(self._records)
+            self._pattern = _compile_id_pattern(self._id_to_zh)
+        return _normalize_ids(text, self._pattern, self._id_to_zh)
+
+
+class CharacterIDMapper(_IDMapperBase):
+    """角色 ID 映射器"""
 
-        return identifier
+    PREFIX = "char"
+    KIND = "角色"
+
+    def register(self, canonical_id: str, zh_name: str, en_name: str) -> None:
+        """注册角色 ID 映射"""
+        self._check_prefix(canonical_id)
+
+        # 验证唯一性
+        if canonical_id in self._by_id:
+            raise ValueError(f"角色 ID 已存在: {canonical_id}")
+        if zh_name in self._by_zh:
+            raise ValueError(f"中文名称已存在: {zh_name}")
+
+        self._store(canonical_id, zh_name, en_name)
 
     def normalize_output(self, text: str) -> str:
         """将 LLM 输出中的 ID 转换为中文名称（用于显示）"""
-        result = text
-        for char_id, zh_name in self.id_to_zh.items():
-            # 替换格式如 {{char_abigail}} 或 [char_abigail] 的 ID
-            result = re.sub(
-                rf"\{{{{[\s]*{re.escape(char_id)}[\s]*\}}}}", zh_name, result
-            )
-            result = re.sub(rf"\[[\s]*{re.escape(char_id)}[\s]*\]", zh_name, result)
-        return result
+        # 替换格式如 {{char_abigail}} 或 [char_abigail] 的 ID
+        return self._normalize(text)
 
 
-class LocationIDMapper:
+class LocationIDMapper(_IDMapperBase):
     """位置 ID 映射器"""
 
     PREFIX = "loc"
-
-    def __init__(self):
-        self.id_to_zh: Dict[str, str] = {}  # loc_town_square -> 小镇广场
-        self.zh_to_id: Dict[str, str] = {}  # 小镇广场 -> loc_town_square
-        self.id_to_en: Dict[str, str] = {}  # loc_town_square -> Town Square
+    KIND = "位置"
 
     def register(self, canonical_id: str, zh_name: str, en_name: str) -> None:
         """注册位置 ID 映射"""
-        if not canonical_id.startswith(f"{self.PREFIX}_"):
-            raise ValueError(
-                f"位置 ID 必须以 '{self.PREFIX}_' 开头，收到: {canonical_id}"
-            )
+        self._check_prefix(canonical_id)
 
         # 验证唯一性
-        if canonical_id in self.id_to_zh:
-            if self.id_to_zh[canonical_id] == zh_name:
+        if canonical_id in self._by_id:
+            if self.get_zh_from_id(canonical_id) == zh_name:
                 return
             raise ValueError(f"位置 ID 已存在: {canonical_id}")
-        if zh_name in self.zh_to_id:
-            if self.zh_to_id[zh_name] == canonical_id:
+        if zh_name in self._by_zh:
+            if self.get_id_from_zh(zh_name) == canonical_id:
                 return
             raise ValueError(f"中文位置名称已存在: {zh_name}")
 
-        self.id_to_zh[canonical_id] = zh_name
-        self.zh_to_id[zh_name] = canonical_id
-        self.id_to_en[canonical_id] = en_name
-
-    def get_id_from_zh(self, zh_name: str) -> Optional[str]:
-        """从中文名称获取规范 ID"""
-        return self.zh_to_id.get(zh_name)
-
-    def get_zh_from_id(self, canonical_id: str) -> Optional[str]:
-        """从规范 ID 获取中文名称"""
-        return self.id_to_zh.get(canonical_id)
-
-    def get_en_from_id(self, canonical_id: str) -> Optional[str]:
-        """从规范 ID 获取英文名称"""
-        return self.id_to_en.get(canonical_id)
-
-    def get_display_name(self, identifier: str) -> str:
-        """获取显示名称（支持 ID 或中文名称作为输入）"""
-        # 如果输入是 ID
-        if identifier.startswith(f"{self.PREFIX}_"):
-            zh = self.get_zh_from_id(identifier)
-            en = self.get_en_from_id(identifier)
-            if zh and en:
-                return f"{en} ({zh})"
-            return identifier
-
-        # 如果输入是中文名称
-        zh_name = identifier
-        loc_id = self.get_id_from_zh(zh_name)
-        if loc_id:
-            en = self.get_en_from_id(loc_id)
-            if en:
-                return f"{en} ({zh_name})"
-
-        return identifier
+        self._store(canonical_id, zh_name, en_name)
 
     def normalize_output(self, text: str) -> str:
         """将 LLM 输出中的 ID 转换为中文名称（用于显示）"""
-        result = text
-        for loc_id, zh_name in self.id_to_zh.items():
-            # 替换格式如 {{loc_town_square}} 或 [loc_town_square] 的 ID
-            result = re.sub(
-                rf"\{{{{[\s]*{re.escape(loc_id)}[\s]*\}}}}", zh_name, result
-            )
-            result = re.sub(rf"\[[\s]*{re.escape(loc_id)}[\s]*\]", zh_name, result)
-        return result
+        # 替换格式如 {{loc_town_square}} 或 [loc_town_square] 的 ID
+        return self._normalize(text)
 
 
-class ActionIDMapper:
+class ActionIDMapper(_IDMapperBase):
     """动作 ID 映射器"""
 
     PREFIX = "act"
-
-    def __init__(self):
-        self.id_to_zh: Dict[str, str] = {}  # act_move -> 移动
-        self.zh_to_id: Dict[str, str] = {}  # 移动 -> act_move
-        self.id_to_en: Dict[str, str] = {}  # act_move -> Move
-        self.en_to_id: Dict[str, str] = {}  # Move -> act_move
+    KIND = "动作"
 
     def register(self, canonical_id: str, zh_name: str, en_name: str) -> None:
         """注册动作 ID 映射"""
-        if not canonical_id.startswith(f"{self.PREFIX}_"):
-            raise ValueError(
-                f"动作 ID 必须以 '{self.PREFIX}_' 开头，收到: {canonical_id}"
-            )
-
-        self.id_to_zh[canonical_id] = zh_name
-        self.zh_to_id[zh_name] = canonical_id
-        self.id_to_en[canonical_id] = en_name
-        self.en_to_id[en_name] = canonical_id
-
-    def get_id_from_zh(self, zh_name: str) -> Optional[str]:
-        return self.zh_to_id.get(zh_name)
+        self._check_prefix(canonical_id)
+        self._store(canonical_id, zh_name, en_name)
 
     def get_id_from_en(self, en_name: str) -> Optional[str]:
-        return self.en_to_id.get(en_name)
-
-    def get_zh_from_id(self, canonical_id: str) -> Optional[str]:
-        return self.id_to_zh.get(canonical_id)
-
-    def get_en_from_id(self, canonical_id: str) -> Optional[str]:
-        return self.id_to_en.get(canonical_id)
+        index = self._by_en.get(en_name)
+        return None if index is None else self._records[index].canonical_id
 
     def get_display_name(self, identifier: str) -> str:
         if identifier.startswith(f"{self.PREFIX}_"):
-            zh = self.get_zh_from_id(identifier)
-            en = self.get_en_from_id(identifier)
-            if zh and en:
-                return f"{en} ({zh})"
-            return identifier
+            return super().get_display_name(identifier)
         return identifier
 
 
@@ -215,6 +228,19 @@ class IDMappingManager:
         self.characters = CharacterIDMapper()
         self.locations = LocationIDMapper()
         self.actions = ActionIDMapper()
+        # 角色与位置 ID 合并后的单次替换正则，注册数量变化后按需重建
+        self._pattern: Optional[re.Pattern] = None
+        self._pattern_key: Tuple[int, int] = (0, 0)
+        self._ref_to_zh: Dict[str, str] = {}
+
+        # 高频查询直接绑定到各映射器的方法，省去一层包装函数调用
+        self.char_id_from_zh = self.characters.get_id_from_zh
+        self.char_zh_from_id = self.characters.get_zh_from_id
+        self.loc_id_from_zh = self.locations.get_id_from_zh
+        self.loc_zh_from_id = self.locations.get_zh_from_id
+        self.act_id_from_zh = self.actions.get_id_from_zh
+        self.act_id_from_en = self.actions.get_id_from_en
+        self.act_zh_from_id = self.actions.get_zh_from_id
 
     def register_character(self, canonical_id: str, zh_name: str, en_name: str) -> None:
         """注册角色"""
@@ -242,47 +268,23 @@ class IDMappingManager:
 
     def normalize_output(self, text: str) -> str:
         """规范化 LLM 输出（替换所有 ID 为中文名称）"""
-        result = text
-        result = self.characters.normalize_output(result)
-        result = self.locations.normalize_output(result)
-        # action 没有必要规范化
-        return result
-
-    def char_id_from_zh(self, zh_name: str) -> Optional[str]:
-        """从中文名称获取角色 ID"""
-        return self.characters.get_id_from_zh(zh_name)
-
-    def char_zh_from_id(self, char_id: str) -> Optional[str]:
-        """从 ID 获取中文名称"""
-        return self.characters.get_zh_from_id(char_id)
-
-    def loc_id_from_zh(self, zh_name: str) -> Optional[str]:
-        """从中文名称获取位置 ID"""
-        return self.locations.get_id_from_zh(zh_name)
-
-    def loc_zh_from_id(self, loc_id: str) -> Optional[str]:
-        """从 ID 获取中文位置名称"""
-        return self.locations.get_zh_from_id(loc_id)
-
-    def act_id_from_zh(self, zh_name: str) -> Optional[str]:
-        return self.actions.get_id_from_zh(zh_name)
-
-    def act_id_from_en(self, en_name: str) -> Optional[str]:
-        return self.actions.get_id_from_en(en_name)
-
-    def act_zh_from_id(self, act_id: str) -> Optional[str]:
-        return self.actions.get_zh_from_id(act_id)
+        # 角色与位置在同一次扫描中替换；action 没有必要规范化
+        key = (len(self.characters), len(self.locations))
+        if key != self._pattern_key:
+            self._ref_to_zh = _id_to_zh(
+                self.characters.records + self.locations.records
+            )
+            self._pattern = _compile_id_pattern(self._ref_to_zh)
+            self._pattern_key = key
+        return _normalize_ids(text, self._pattern, self._ref_to_zh)
 
 
-# 全局单例
-_id_manager = None
+# 全局单例：构造开销很小，导入时直接创建，获取时无需判空
+_id_manager = IDMappingManager()
 
 
 def get_id_manager() -> IDMappingManager:
     """获取全局 ID 映射管理器单例"""
-    global _id_manager
-    if _id_manager is None:
-        _id_manager = IDMappingManager()
     return _id_manager
 
 
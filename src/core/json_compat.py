@@ -0,0 +1,67 @@
+"""
+JSON 序列化兼容层：安装了 orjson 时使用其 C 实现，否则回退到标准库 json
+"""
+
+import json
+import mmap
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def dumps_line(obj) -> bytes:
+    """序列化为一行 UTF-8 编码的 JSON（含结尾换行），用于 JSONL 日志"""
+    if orjson is not None:
+        return orjson.dumps(
+            obj, option=orjson.OPT_APPEND_NEWLINE | orjson.OPT_NON_STR_KEYS
+        )
+    return (json.dumps(obj, ensure_ascii=False) + "\n").encode("utf-8")
+
+
+def loads(data):
+    """解析 JSON 文本（str 或 bytes）"""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def loads_object(text: str):
+    """
+    解析 LLM 返回的 JSON 对象
+
+    整体解析失败时截取第一个 '{' 到最后一个 '}' 之间的内容再试一次，
+    容忍代码块标记、前后说明文字等噪声，避免一次格式瑕疵浪费整个规划周期。
+    """
+    try:
+        return loads(text)
+    except ValueError:
+        start = text.find("{")
+        end = text.rfind("}")
+        if start < 0 or end <= start:
+            raise
+        return loads(text[start : end + 1])
+
+
+def load(fp):
+    """从以二进制模式打开的文件中解析 JSON，跳过文本解码层"""
+    return loads(fp.read())
+
+
+def load_mapped(fp):
+    """
+    通过内存映射解析以二进制模式打开的文件
+
+    orjson 可直接读取映射的页面，省去把整个文件读入内存的拷贝；
+    空文件无法映射，回退到普通读取。
+    """
+    try:
+        mm = mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ)
+    except ValueError:
+        return load(fp)
+    with mm:
+        if orjson is not None:
+            with memoryview(mm) as view:
+                return orjson.loads(view)
+        return json.loads(mm[:])
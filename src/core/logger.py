@@ -1,21 +1,22 @@
-import json
 import os
+import queue
+import threading
+import time
 from datetime import datetime
-from typing import List, Dict, Any
-import contextvars
 
-sim_time_var = contextvars.ContextVar("sim_time", default="N/A")
+from src.core import json_compat
 
+# 未绑定模拟时间时 extra 中的默认值，通过 logger.configure(extra=...) 设置
+LOG_EXTRA_DEFAULTS = {"sim_time": "N/A"}
 
-def loguru_formatter(record):
-    """Custom formatter for loguru to include simulation time."""
-    sim_time = sim_time_var.get()
-    # Format: Time | Level | [Sim: Time] | Module:Line - Message
-    return (
-        "<green>{time:YYYY-MM-DD HH:mm:ss}</green> | <level>{level: <8}</level> | <cyan>[Sim: "
-        + str(sim_time)
-        + "]</cyan> | <cyan>{name}</cyan>:<cyan>{function}</cyan>:<cyan>{line}</cyan> - <level>{message}</level>\n"
-    )
+
+# Format: Time | Level | [Sim: Time] | Module:Line - Message
+# 使用静态格式字符串，由 loguru 预编译；模拟时间通过 logger.contextualize 绑定到 extra
+LOG_FORMAT = (
+    "<green>{time:YYYY-MM-DD HH:mm:ss}</green> | <level>{level: <8}</level> | "
+    "<cyan>[Sim: {extra[sim_time]}]</cyan> | "
+    "<cyan>{name}</cyan>:<cyan>{function}</cyan>:<cyan>{line}</cyan> - <level>{message}</level>"
+)
 
 
 def format_timestamp_for_filename(dt: datetime) -> str:
@@ -29,12 +30,37 @@ def get_log_filename(session_start: datetime = None):
 
 
 class SimulationLogger:
+    """
+    模拟事件日志：以 JSONL 格式追加写入，每行一个事件
+
+    log() 只把事件放入队列，序列化与写文件由后台写线程完成，与下一个 tick 并行。
+    写线程每次最多取出 FLUSH_EVERY 条事件批量写入带缓冲的文件，
+    队列空闲时每 FLUSH_INTERVAL 秒刷新一次；save() 会等待队列写完后关闭文件。
+    """
+
+    FLUSH_EVERY = 256
+    FLUSH_INTERVAL = 5.0
+
+    # 通知写线程退出的哨兵
+    _STOP = object()
+
     def __init__(self, save_dir="logs", session_start: datetime = None):
         self.save_dir = save_dir
         if not os.path.exists(save_dir):
             os.makedirs(save_dir)
-        self.events: List[Dict[str, Any]] = []
         self.session_id = datetime.now().strftime("%Y%m%d_%H%M%S")
+        self.filepath = os.path.join(
+            save_dir, f"simulation_log_{self.session_id}.jsonl"
+        )
+
+        self._lock = threading.Lock()
+        self._closed = False
+        self._fp = open(self.filepath, "ab", buffering=1 << 16)
+        self._queue: queue.SimpleQueue = queue.SimpleQueue()
+        self._writer = threading.Thread(
+            target=self._writer_loop, name="SimulationLogWriter", daemon=True
+        )
+        self._writer.start()
 
     def log(self, game_time: str, event_type: str, **kwargs):
         """
@@ -45,25 +71,87 @@ class SimulationLogger:
             event_type: 事件类型（例如 "plan", "dialogue", "action"）。
             **kwargs: 事件的额外详情。
         """
-        event = {
-            "timestamp": game_time,
-            "real_time": datetime.now().isoformat(),
-            "type": event_type,
-            "details": kwargs,
-        }
-        self.events.append(event)
+        if self._closed:
+            return
+        self._queue.put(
+            {
+                "timestamp": game_time,
+                "real_time": datetime.now().isoformat(),
+                "type": event_type,
+                "details": kwargs,
+            }
+        )
+
+    def _writer_loop(self):
+        """后台写线程：批量序列化队列中的事件并写入文件，直到收到哨兵"""
+        last_flush = time.monotonic()
+        dirty = False
+        while True:
+            try:
+                event = self._queue.get(timeout=self.FLUSH_INTERVAL)
+            except queue.Empty:
+                if dirty:
+                    self._flush()
+                    dirty = False
+                last_flush = time.monotonic()
+                continue
+
+            # 一次取出已排队的事件（最多 FLUSH_EVERY 条），合并为一次写入
+            batch = []
+            stop = False
+            while True:
+                if event is self._STOP:
+                    stop = True
+                    break
+                try:
+                    batch.append(json_compat.dumps_line(event))
+                except Exception as e:
+                    # 单条无法序列化的事件只丢弃它本身，不能让写线程退出
+                    print(f"Error serializing simulation log event: {e}")
+                if len(batch) >= self.FLUSH_EVERY:
+                    break
+                try:
+                    event = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+
+            if batch:
+                try:
+                    self._fp.write(b"".join(batch))
+                    dirty = True
+                except Exception as e:
+                    print(f"Error writing simulation log: {e}")
+
+            now = time.monotonic()
+            if stop:
+                return
+            if dirty and (
+                len(batch) >= self.FLUSH_EVERY
+                or now - last_flush >= self.FLUSH_INTERVAL
+            ):
+                self._flush()
+                dirty = False
+                last_flush = now
+
+    def _flush(self):
+        try:
+            self._fp.flush()
+        except Exception as e:
+            print(f"Error flushing simulation log: {e}")
 
     def save(self) -> str:
         """
-        将收集的日志保存为 JSON 文件。
+        等待队列中的事件写完，刷新并关闭日志文件。
         返回保存文件的路径。
         """
-        filename = f"simulation_log_{self.session_id}.json"
-        filepath = os.path.join(self.save_dir, filename)
         try:
-            with open(filepath, "w", encoding="utf-8") as f:
-                json.dump(self.events, f, ensure_ascii=False, indent=2)
-            return filepath
+            with self._lock:
+                if not self._closed:
+                    self._closed = True
+                    self._queue.put(self._STOP)
+                    self._writer.join()
+                    self._fp.close()
+            return self.filepath
         except Exception as e:
             print(f"Error saving simulation log: {e}")
             return ""
@@ -1,8 +1,14 @@
+from dataclasses import dataclass, field
 from enum import Enum
-from typing import List, Dict, Optional
-from pydantic import BaseModel
-import json
+from functools import lru_cache
+from typing import List, Dict, Optional, Tuple
+import math
 import os
+import sys
+
+from src.core import json_compat
+
+LOCATIONS_DATA_PATH = "data/locations.json"
 
 
 class LocationType(Enum):
@@ -12,39 +18,70 @@ class LocationType(Enum):
     LIBRARY = "Library"
 
 
-class Notice(BaseModel):
+# 数据文件中的类型字符串（大写）-> 枚举成员
+_TYPE_LOOKUP: Dict[str, LocationType] = {m.name: m for m in LocationType}
+
+
+@dataclass(slots=True)
+class Notice:
     content: str
     author: str
     created_at: str
 
 
-class Location(BaseModel):
+@dataclass(slots=True, kw_only=True)
+class Location:
     name: str
     english_name: Optional[str] = None
     type: LocationType
     description: str
-    connected_locations: List[str] = []
+    connected_locations: List[str] = field(default_factory=list)
     coordinates: tuple[int, int] = (0, 0)  # 渲染用
-    notices: List[Notice] = []
+    notices: List[Notice] = field(default_factory=list)
+
+
+@lru_cache(maxsize=1)
+def load_locations_data() -> dict:
+    """读取并缓存地点数据文件，地图、ID 映射与住宅初始化共用同一份解析结果（只读）"""
+    with open(LOCATIONS_DATA_PATH, "rb") as f:
+        return json_compat.load(f)
+
+
+@lru_cache(maxsize=16)
+def ring_coordinates(
+    count: int, center_x: int = 400, center_y: int = 300, radius: int = 250
+) -> Tuple[Tuple[int, int], ...]:
+    """将 count 个地点均匀排布在以 (center_x, center_y) 为圆心的圆周上，返回整数坐标
+
+    结果按参数缓存（模拟与回放共用），返回不可变的元组。
+    """
+    if count <= 0:
+        return ()
+    angle_step = math.tau / count
+    return tuple(
+        (
+            int(center_x + radius * math.cos(i * angle_step)),
+            int(center_y + radius * math.sin(i * angle_step)),
+        )
+        for i in range(count)
+    )
 
 
 class GameMap:
     def __init__(self):
         self.locations: Dict[str, Location] = {}
+        # 每次添加或替换地点时递增，供依赖地点表的缓存判断是否需要重建
+        self.version = 0
         self._init_map()
 
     def _init_map(self):
         try:
-            with open("data/locations.json", "r", encoding="utf-8") as f:
-                data = json.load(f)
+            data = load_locations_data()
 
             for loc_data in data.get("static_locations", []):
                 # 将类型字符串映射为枚举
-                type_str = loc_data["type"].upper()
-                loc_type = (
-                    LocationType[type_str]
-                    if type_str in LocationType.__members__
-                    else LocationType.SQUARE
+                loc_type = _TYPE_LOOKUP.get(
+                    loc_data["type"].upper(), LocationType.SQUARE
                 )
 
                 self.add_location(
@@ -76,7 +113,10 @@ class GameMap:
             )
 
     def add_location(self, location: Location):
+        # 驻留地点名，使以地点名为键的查找与比较可走指针快路径
+        location.name = sys.intern(location.name)
         self.locations[location.name] = location
+        self.version += 1
 
     def connect_locations(self, loc1_name: str, loc2_name: str):
         if loc1_name in self.locations and loc2_name in self.locations:
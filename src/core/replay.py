@@ -1,16 +1,42 @@
-import json
 import os
-import math
+import sys
+from bisect import bisect_right
 from datetime import datetime, timedelta
-from typing import List, Dict, Any
+from typing import Any, Dict, Iterator, List, NamedTuple, Optional, Tuple
 from loguru import logger
 
+from src.core import json_compat
 from src.core.game_time import GameTime
-from src.core.map import GameMap, LocationType, Location
+from src.core.map import (
+    GameMap,
+    LocationType,
+    Location,
+    Notice,
+    load_locations_data,
+    ring_coordinates,
+)
 from src.entities.character import Character
 from src.config import Config
 
 
+class PlanRecord(NamedTuple):
+    """加载时从计划事件中预先提取的字段"""
+
+    dt: datetime
+    end: datetime
+    target: Optional[str]
+    action: Optional[str]
+    emoji: str
+
+
+class DialogueRecord(NamedTuple):
+    """加载时从对话事件中预先提取的字段"""
+
+    participants: List[str]
+    # 每位发言者的最后一条发言
+    said: Dict[str, str]
+
+
 class ReplaySimulation:
     def __init__(self, log_path: str, humanity_path: str = "data/characters.json"):
         self.game_map = GameMap()
@@ -19,6 +45,23 @@ class ReplaySimulation:
         self.log_path = log_path
 
         self.events = []
+        # 按类型拆分的时间索引（与事件列表并行，均按时间升序），
+        # 每个 tick 用二分查找定位截止时间，无需线性扫描全部事件
+        # 居民 -> (计划开始时间, 计划记录)
+        self._plans_by_char: Dict[str, Tuple[List[datetime], List[PlanRecord]]] = {}
+        self._dialogue_times: List[datetime] = []
+        # 对话不再视为“近期”的时间（开始后 10 分钟）
+        self._dialogue_expiry: List[datetime] = []
+        self._dialogues: List[DialogueRecord] = []
+        self._notice_times: List[datetime] = []
+        # 公告发布事件对应的公告内容（发布时间已格式化）
+        self._notices: List[Notice] = []
+        # 计划与对话事件的时间（升序），用于判断下一次状态变化
+        self._state_times: List[datetime] = []
+        # 增量更新：上次重建的时间与结果保持有效的截止时间；公告板上次的截止位置
+        self._states_time: Optional[datetime] = None
+        self._states_valid_until: Optional[datetime] = None
+        self._notice_end: Optional[int] = None
         self.start_time = None
         self.end_time = None
         self.current_time = None
@@ -31,6 +74,7 @@ class ReplaySimulation:
 
         # 加载数据
         self._load_characters()
+        self._char_by_name = {c.profile.name: c for c in self.characters}
         self._load_log()
 
         # 初始化状态
@@ -45,8 +89,8 @@ class ReplaySimulation:
             return
 
         try:
-            with open(self.humanity_path, "r", encoding="utf-8") as f:
-                data = json.load(f)
+            with open(self.humanity_path, "rb") as f:
+                data = json_compat.load(f)
 
             for char_data in data:
                 char = Character.from_dict(char_data)
@@ -62,16 +106,12 @@ class ReplaySimulation:
         # 从 JSON 加载住宅描述
         home_desc_config = []
         try:
-            with open("data/locations.json", "r", encoding="utf-8") as f:
-                data = json.load(f)
-                home_desc_config = data.get("home_descriptions", [])
+            home_desc_config = load_locations_data().get("home_descriptions", [])
         except Exception:
             pass
 
         # 为居民创建住宅地点
         # 此逻辑与 Simulation._init_homes 大致一致，以保证地图显示相同
-        center_x, center_y, radius = 400, 300, 250
-
         # 按住所分组
         residences = {}
         for char in self.characters:
@@ -81,13 +121,9 @@ class ReplaySimulation:
             residences[res_name].append(char)
 
         homes_to_place = [r for r in residences.keys() if r != "酒馆"]
-        num_homes = len(homes_to_place)
-        angle_step = 2 * 3.14159 / num_homes if num_homes > 0 else 0
+        coordinates = ring_coordinates(len(homes_to_place))
 
-        for i, home_name in enumerate(homes_to_place):
-            angle = i * angle_step
-            x = int(center_x + radius * math.cos(angle))
-            y = int(center_y + radius * math.sin(angle))
+        for home_name, (x, y) in zip(homes_to_place, coordinates):
 
             # 创建地点
             loc = Location(
@@ -112,38 +148,144 @@ class ReplaySimulation:
                     char.current_location = "酒馆"
                     char.position = saloon.coordinates
 
+    def _read_events(self, f) -> Iterator[Dict[str, Any]]:
+        """逐条产出日志事件；JSONL 日志按行流式解析，不会整体驻留原始文本"""
+        if self.log_path.endswith(".jsonl"):
+            for line in f:
+                if line.strip():
+                    yield json_compat.loads(line)
+        else:
+            yield from json_compat.load_mapped(f)
+
+    @staticmethod
+    def _parse_timestamp(ts_str: str) -> Optional[datetime]:
+        if not isinstance(ts_str, str):
+            return None
+        # 快速路径：定宽的 "YYYY-MM-DD HH:MM" 与 "HH:MM" 直接切片，避免 strptime
+        try:
+            if (
+                len(ts_str) == 16
+                and ts_str[4] == ts_str[7] == "-"
+                and ts_str[10] == " "
+                and ts_str[13] == ":"
+            ):
+                return datetime(
+                    int(ts_str[0:4]),
+                    int(ts_str[5:7]),
+                    int(ts_str[8:10]),
+                    int(ts_str[11:13]),
+                    int(ts_str[14:16]),
+                )
+            if len(ts_str) == 5 and ts_str[2] == ":":
+                return datetime(2025, 1, 1, int(ts_str[0:2]), int(ts_str[3:5]))
+        except ValueError:
+            pass
+        try:
+            # 先尝试完整格式
+            return datetime.strptime(ts_str, "%Y-%m-%d %H:%M")
+        except ValueError:
+            try:
+                # 回退到 HH:MM（假定为默认日期 2025-01-01）
+                t = datetime.strptime(ts_str, "%H:%M")
+                return datetime(2025, 1, 1, t.hour, t.minute)
+            except ValueError:
+                return None
+
     def _load_log(self):
+        # 解析时间戳：同一 tick 内的事件共享时间字符串，解析结果按字符串缓存，
+        # 相同时间的事件引用同一个 datetime 对象
+        parsed_events = []
+        timestamps: Dict[str, Optional[datetime]] = {}
         try:
-            with open(self.log_path, "r", encoding="utf-8") as f:
-                self.events = json.load(f)
+            with open(self.log_path, "rb") as f:
+                for event in self._read_events(f):
+                    ts_str = event.get("timestamp")
+                    if ts_str not in timestamps:
+                        timestamps[ts_str] = self._parse_timestamp(ts_str)
+                    ts = timestamps[ts_str]
+                    if ts is None:
+                        continue
+                    event["_dt"] = ts
+                    parsed_events.append(event)
         except Exception as e:
             logger.error(f"Failed to load log: {e}")
             return
 
-        # 解析时间戳
-        parsed_events = []
-        for event in self.events:
-            ts_str = event.get("timestamp")
-            try:
-                # 先尝试完整格式
-                ts = datetime.strptime(ts_str, "%Y-%m-%d %H:%M")
-            except ValueError:
-                try:
-                    # 回退到 HH:MM（假定为默认日期 2025-01-01）
-                    t = datetime.strptime(ts_str, "%H:%M")
-                    ts = datetime(2025, 1, 1, t.hour, t.minute)
-                except ValueError:
-                    continue
-
-            event["_dt"] = ts
-            parsed_events.append(event)
-
-        self.events = sorted(parsed_events, key=lambda x: x["_dt"])
+        parsed_events.sort(key=lambda x: x["_dt"])
+        self.events = parsed_events
+        self._build_indices()
 
         if self.events:
             self.start_time = self.events[0]["_dt"]
             self.end_time = self.events[-1]["_dt"] + timedelta(minutes=60)  # 添加缓冲
 
+    def _build_indices(self):
+        """按类型建立时间索引：计划按居民分组，对话与公告各自成列。
+
+        回放时只读取记录中预先提取的字段，不再逐 tick 查询事件字典。
+        """
+        # 派生时间同样按值复用，大量事件共享少量 datetime 对象
+        derived: Dict[Tuple[datetime, Any], datetime] = {}
+
+        def shifted(dt: datetime, minutes) -> datetime:
+            key = (dt, minutes)
+            value = derived.get(key)
+            if value is None:
+                value = derived[key] = dt + timedelta(minutes=minutes)
+            return value
+
+        def name(value):
+            # 日志中每个事件都带有独立的名字字符串，驻留后与居民、地点名共享同一对象
+            return sys.intern(value) if isinstance(value, str) else value
+
+        for event in self.events:
+            if event["type"] in ("plan", "dialogue"):
+                self._state_times.append(event["_dt"])
+
+            if event["type"] == "plan":
+                details = event.get("details", {})
+                times, plans = self._plans_by_char.setdefault(
+                    name(details.get("character")), ([], [])
+                )
+                times.append(event["_dt"])
+                plans.append(
+                    PlanRecord(
+                        dt=event["_dt"],
+                        end=shifted(event["_dt"], details.get("duration", 15)),
+                        target=name(details.get("target_location")),
+                        action=details.get("action"),
+                        emoji=details.get("emoji", "👤"),
+                    )
+                )
+
+                # 检查是否是发布公告
+                if (
+                    "Post Notice" in details.get("action", "")
+                    and details.get("target_location", "") == "小镇广场"
+                ):
+                    self._notice_times.append(event["_dt"])
+                    self._notices.append(
+                        Notice(
+                            content=details.get("dialogue", ""),
+                            author=details.get("character", "Unknown"),
+                            # 使用事件时间作为发布时间
+                            created_at=event["_dt"].strftime("%Y-%m-%d %H:%M"),
+                        )
+                    )
+            elif event["type"] == "dialogue":
+                details = event["details"]
+                self._dialogue_times.append(event["_dt"])
+                self._dialogue_expiry.append(shifted(event["_dt"], 10))
+                self._dialogues.append(
+                    DialogueRecord(
+                        participants=[name(p) for p in details.get("participants", [])],
+                        said={
+                            msg["speaker"]: msg["content"]
+                            for msg in details.get("messages", [])
+                        },
+                    )
+                )
+
     def update(self):
         if not self.paused and self.current_time and self.end_time:
             self.current_time += timedelta(minutes=self.minutes_per_tick * self.speed)
@@ -173,71 +315,61 @@ class ReplaySimulation:
         if not square:
             return
 
-        # 收集所有截止到当前时间的公告发布事件
-        valid_notices = []
-        from src.core.map import Notice
-
-        for event in self.events:
-            if event["_dt"] > self.current_time:
-                break
-
-            if event["type"] == "plan":
-                details = event.get("details", {})
-                action = details.get("action", "")
-                target = details.get("target_location", "")
-
-                # 检查是否是发布公告
-                if "Post Notice" in action and target == "小镇广场":
-                    author = details.get("character", "Unknown")
-                    content = details.get("dialogue", "")
-                    # 使用事件时间作为发布时间
-                    created_at = event["_dt"].strftime("%Y-%m-%d %H:%M")
-
-                    notice = Notice(
-                        content=content, author=author, created_at=created_at
-                    )
-                    # 插入到开头（最新的在前）
-                    valid_notices.insert(0, notice)
-
-        # 仅保留最新的 5 条
-        square.notices = valid_notices[:5]
+        # 截止到当前时间的公告发布事件中，仅保留最新的 5 条
+        end = bisect_right(self._notice_times, self.current_time)
+        if end == self._notice_end:
+            # 没有新的公告发布或撤回，沿用当前公告板
+            return
+        self._notice_end = end
+        # 最新的在前；复制记录，避免公告板上的修改影响索引
+        square.notices = [
+            Notice(n.content, n.author, n.created_at)
+            for n in reversed(self._notices[max(0, end - 5) : end])
+        ]
 
     def _update_character_states(self):
+        # 时间前进且尚未到达下一次状态变化（新事件、计划结束或对话过期）时无需重建
+        if (
+            self._states_time is not None
+            and self._states_time <= self.current_time < self._states_valid_until
+        ):
+            return
+
         # 是否先重置所有居民为空闲/家中？
         # 不，改为查找每个居民的活动计划。
 
-        # char_name -> 最新计划事件 映射
-        active_plans = {}
-
-        # 同时查找最近的对话
-        recent_dialogues = []
-
-        for event in self.events:
-            if event["_dt"] > self.current_time:
-                break
-
-            if event["type"] == "plan":
-                char_name = event["details"].get("character")
-                active_plans[char_name] = event
-            elif event["type"] == "dialogue":
-                # 检查对话是否“近期”（如 10 分钟内）
-                if (self.current_time - event["_dt"]).total_seconds() < 10 * 60:
-                    recent_dialogues.append(event)
-
-        # 应用计划
+        # 下一个计划或对话事件的时间
+        upcoming = bisect_right(self._state_times, self.current_time)
+        valid_until = (
+            self._state_times[upcoming]
+            if upcoming < len(self._state_times)
+            else datetime.max
+        )
+
+        # 同时查找最近的对话：检查对话是否“近期”（如 10 分钟内）
+        first_recent = bisect_right(self._dialogue_expiry, self.current_time)
+        recent_dialogues = self._dialogues[
+            first_recent : bisect_right(self._dialogue_times, self.current_time)
+        ]
+
+        # 应用计划：每个居民截止到当前时间的最新计划
         for char in self.characters:
-            plan = active_plans.get(char.profile.name)
+            plan = None
+            times, plans = self._plans_by_char.get(char.profile.name, ((), ()))
+            latest = bisect_right(times, self.current_time)
+            if latest:
+                plan = plans[latest - 1]
             if plan:
                 # 检查计划是否仍在进行中
-                start_time = plan["_dt"]
-                duration = plan["details"].get("duration", 15)
-                end_time = start_time + timedelta(minutes=duration)
+                start_time = plan.dt
+                end_time = plan.end
 
                 if self.current_time <= end_time:
                     # 正在进行中
-                    target = plan["details"].get("target_location")
-                    action = plan["details"].get("action")
-                    emoji = plan["details"].get("emoji", "👤")
+                    valid_until = min(valid_until, end_time)
+                    target = plan.target
+                    action = plan.action
+                    emoji = plan.emoji
 
                     char.current_location = target
                     char.status = f"{action} (Replay)"
@@ -269,14 +401,20 @@ class ReplaySimulation:
 
         # 应用对话（覆盖状态）
         for diag in recent_dialogues:
-            participants = diag["details"].get("participants", [])
-            messages = diag["details"].get("messages", [])
+            said = diag.said
 
             # 只显示最后一条消息或通用的“正在交谈”提示
-            for char in self.characters:
-                if char.profile.name in participants:
-                    char.status = f"Talking... (Replay)"
-                    # 尝试找到他们的具体发言
-                    for msg in messages:
-                        if msg["speaker"] == char.profile.name:
-                            char.status = f"Said: {msg['content']}"
+            for name in diag.participants:
+                char = self._char_by_name.get(name)
+                if char is None:
+                    continue
+                if name in said:
+                    char.status = f"Said: {said[name]}"
+                else:
+                    char.status = "Talking... (Replay)"
+
+        # 最早的一条近期对话过期时需要重建
+        if recent_dialogues:
+            valid_until = min(valid_until, self._dialogue_expiry[first_recent])
+        self._states_time = self.current_time
+        self._states_valid_until = valid_until
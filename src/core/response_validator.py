@@ -4,10 +4,54 @@ LLM 响应验证和转换：处理规范 ID 的验证和转换为内部格式
 
 import json
 import re
-from typing import Dict, Optional, Any
+from functools import lru_cache
+from typing import Dict, Optional, Any, Tuple
 from loguru import logger
 
-from src.core.id_mapper import get_id_manager
+from src.core.id_mapper import IDMappingManager, get_id_manager
+
+# 角色 ID 引用的合并正则：(角色数量, 正则, 小写 ID -> 中文名)，注册数量变化后重建
+_char_ref_cache: Tuple[int, Optional[re.Pattern], Dict[str, str]] = (0, None, {})
+
+
+def _character_reference_pattern(
+    manager: IDMappingManager,
+) -> Tuple[Optional[re.Pattern], Dict[str, str]]:
+    """获取匹配所有角色 ID 的单个正则（忽略大小写）及对应的替换表"""
+    global _char_ref_cache
+    records = manager.characters.records
+    if _char_ref_cache[0] != len(records):
+        ids = sorted((r.canonical_id for r in records), key=len, reverse=True)
+        pattern = (
+            re.compile(rf"\b({'|'.join(map(re.escape, ids))})\b", re.IGNORECASE)
+            if ids
+            else None
+        )
+        id_to_zh = {r.canonical_id.lower(): r.zh_name for r in records}
+        _char_ref_cache = (len(records), pattern, id_to_zh)
+    return _char_ref_cache[1], _char_ref_cache[2]
+
+
+@lru_cache(maxsize=256)
+def _location_description(zh_name: str, description: str, generation: int) -> str:
+    """
+    单个位置的上下文描述行
+
+    generation 为已注册的位置数量，位置映射变化后自动使用新的缓存键；
+    旧代的条目由 LRU 淘汰，缓存大小不随位置映射的变化次数增长。
+    """
+    manager = get_id_manager()
+
+    # 获取规范 ID
+    loc_id = manager.loc_id_from_zh(zh_name)
+    if not loc_id:
+        logger.warning(f"找不到位置 '{zh_name}' 的规范 ID")
+        loc_id = f"loc_{zh_name}"
+
+    # 获取英文名称
+    en_name = manager.locations.get_en_from_id(loc_id) or zh_name
+
+    return f"- {loc_id}: {en_name} ({zh_name}) - {description}"
 
 
 class LLMResponseValidator:
@@ -51,7 +95,7 @@ class LLMResponseValidator:
             if not target_location_zh:
                 logger.warning(
                     f"无法转换位置 ID: {target_loc_id}. "
-                    f"可用的位置 ID: {list(manager.locations.id_to_zh.keys())}"
+                    f"可用的位置 ID: {[r.canonical_id for r in manager.locations.records]}"
                 )
                 # 回退：尝试使用 ID 本身作为位置名称
                 target_location_zh = target_loc_id
@@ -180,24 +224,11 @@ class ContextBuilder:
         Returns:
             格式化的位置上下文字符串
         """
-        manager = get_id_manager()
-        location_descriptions = []
-
-        for zh_name, loc in locations_dict.items():
-            # 获取规范 ID
-            loc_id = manager.loc_id_from_zh(zh_name)
-            if not loc_id:
-                logger.warning(f"找不到位置 '{zh_name}' 的规范 ID")
-                loc_id = f"loc_{zh_name}"
-
-            # 获取英文名称
-            en_name = manager.locations.get_en_from_id(loc_id) or zh_name
-
-            # 创建位置描述
-            description = f"- {loc_id}: {en_name} ({zh_name}) - {loc.description}"
-            location_descriptions.append(description)
-
-        return "\n".join(location_descriptions)
+        generation = len(get_id_manager().locations)
+        return "\n".join(
+            _location_description(zh_name, loc.description, generation)
+            for zh_name, loc in locations_dict.items()
+        )
 
     @staticmethod
     def build_characters_context(
@@ -279,13 +310,8 @@ class ResponseConverter:
         Returns:
             规范化后的文本（使用中文名称）
         """
-        manager = get_id_manager()
-        result = text
-
-        # 规范化 ID 引用
-        for char_id, zh_name in manager.characters.id_to_zh.items():
-            result = re.sub(
-                rf"\b{re.escape(char_id)}\b", zh_name, result, flags=re.IGNORECASE
-            )
-
-        return result
+        # 规范化 ID 引用：所有角色 ID 合并为一个正则，单次扫描完成替换
+        pattern, id_to_zh = _character_reference_pattern(get_id_manager())
+        if pattern is None:
+            return text
+        return pattern.sub(lambda m: id_to_zh[m.group(1).lower()], text)
@@ -1,23 +1,39 @@
 import os
 import json
-import math
+import asyncio
 import random
+import re
 import threading
-from typing import List
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
 from loguru import logger
-from datetime import timedelta
+from datetime import datetime, timedelta
 
+from src.core import json_compat
 from src.core.game_time import GameTime
 from src.config import Config
-from src.core.map import GameMap, LocationType, Location, Notice
-from src.core.logger import SimulationLogger, sim_time_var
+from src.core.map import (
+    GameMap,
+    LocationType,
+    Location,
+    Notice,
+    load_locations_data,
+    ring_coordinates,
+)
+from src.core.logger import SimulationLogger
 from src.entities.character import Character
-from src.ai.llm_client import LLMClient
+from src.ai.llm_client import LLMClient, partial_json_string
 from src.ai.prompts import (
-    PLANNING_SYSTEM_PROMPT,
+    PLANNING_CONTEXT_PROMPT,
     PLANNING_USER_PROMPT,
-    DIALOGUE_SYSTEM_PROMPT,
+    DIALOGUE_CONTEXT_PROMPT,
     DIALOGUE_USER_PROMPT,
+    DIALOGUE_PAIR_SPEAKER_PROMPT,
+    DIALOGUE_PAIR_USER_PROMPT,
+    build_static_planning_system,
+    build_static_dialogue_system,
+    build_static_dialogue_pair_system,
 )
 from src.core.id_mapper import init_id_mappings, get_id_manager
 from src.core.response_validator import (
@@ -26,6 +42,15 @@ from src.core.response_validator import (
     ResponseConverter,
 )
 
+# 每隔多少个 tick 清理一次已过期的交互冷却
+COOLDOWN_SWEEP_TICKS = 100
+
+
+@lru_cache(maxsize=1024)
+def _status_summary(status: str) -> str:
+    """状态概要：去掉括号及其后的附注"""
+    return status.split("(")[0].strip() if "(" in status else status
+
 
 class Simulation:
     def __init__(
@@ -42,8 +67,8 @@ class Simulation:
 
         if os.path.exists(config_path):
             try:
-                with open(config_path, "r", encoding="utf-8") as f:
-                    config_data = json.load(f)
+                with open(config_path, "rb") as f:
+                    config_data = json_compat.load(f)
                     sim_config = config_data.get("simulation", {})
                     start_year = sim_config.get("start_year", 2025)
                     start_month = sim_config.get("start_month", 1)
@@ -53,7 +78,8 @@ class Simulation:
                 logger.error(f"Failed to load config: {e}")
 
         self.game_time = GameTime(start_year, start_month, start_day, start_hour)
-        sim_time_var.set(self.game_time.get_display_string())
+        # 实时模拟；回放模拟 (ReplaySimulation) 中为 True，界面据此切换控制栏
+        self.is_replay = False
         self.game_map = GameMap()
         self.characters: List[Character] = []
         self.llm_client = LLMClient()
@@ -66,6 +92,8 @@ class Simulation:
             raise e
 
         self.humanity_path = humanity_path
+        # 居民数据文件的解析结果，加载居民与建立 ID 映射共用，只读取一次
+        self._characters_data: Optional[list] = None
         self.duration_days = duration_days
         self.event_day = duration_days
 
@@ -73,14 +101,57 @@ class Simulation:
         # 例如：从7月28日6点开始，持续2天，则结束在7月30日22点
         end_day = self.game_time.current_time + timedelta(days=duration_days)
         self.end_time = end_day.replace(hour=22, minute=0, second=0, microsecond=0)
+        # 最后一天 20:00 之后，所有人都睡觉即可提前结束（22:00 - 2小时）
+        self.early_end_time = self.end_time - timedelta(hours=2)
+
+        # 居民 uid 对 -> 冷却结束的游戏分钟（GameTime.minutes）
+        self.interaction_cooldowns: Dict[Tuple[int, int], int] = {}
+        # 下一次清理过期冷却的游戏分钟
+        self._next_cooldown_sweep = 0
+
+        # 地点与动作表格在运行期间不变，按地图版本与动作数量缓存，变化后重建
+        self._static_tables_key: Optional[Tuple[int, int]] = None
+        self._static_tables: Tuple[str, str] = ("", "")
+        # 居民档案上下文跨 tick 不变：居民名 -> (规划上下文, 对话上下文)
+        self._profile_contexts: Dict[str, Tuple[str, str]] = {}
+        # 本 tick 所有居民的位置与状态行：(构建时的游戏时间, 行列表, 居民名 -> 行号)
+        self._status_board: Optional[Tuple[datetime, List[str], Dict[str, int]]] = None
+        # 地点 -> 该处的居民（按 uid 排序），随居民移动增量维护；
+        # 移动发生在事件循环线程，读取发生在主线程，因此需要加锁
+        self._location_index: Dict[str, List[Character]] = {}
+        self._location_lock = threading.Lock()
+
+        # 常驻事件循环线程：并发执行所有居民的规划请求
+        self._loop = asyncio.new_event_loop()
+        # 阻塞调用（如记忆优化）通过 asyncio.to_thread 进入容量固定的常驻线程池
+        self._executor = ThreadPoolExecutor(
+            max_workers=Config.LLM_MAX_CONCURRENCY, thread_name_prefix="ai-town"
+        )
+        self._loop.set_default_executor(self._executor)
+        self._loop_thread = threading.Thread(target=self._loop.run_forever)
+        self._loop_thread.daemon = True
+        self._loop_thread.start()
+
+        # 全局 ID 映射管理器（单例，只取一次）
+        self.id_manager = get_id_manager()
 
-        self.interaction_cooldowns = {}
         # Use simulation start time for logger session id
         self.logger = SimulationLogger(session_start=self.game_time.current_time)
 
         self._load_characters()
         self._init_id_mappings()
         self._init_homes()
+        self._init_location_index()
+        # ID 映射就绪后一次性构建所有居民的档案上下文
+        for char in self.characters:
+            self._get_profile_contexts(char)
+
+    def _read_characters_data(self) -> list:
+        """读取并缓存居民数据文件（只读）"""
+        if self._characters_data is None:
+            with open(self.humanity_path, "rb") as f:
+                self._characters_data = json_compat.load(f)
+        return self._characters_data
 
     def _load_characters(self):
         if not os.path.exists(self.humanity_path):
@@ -88,8 +159,7 @@ class Simulation:
             return
 
         try:
-            with open(self.humanity_path, "r", encoding="utf-8") as f:
-                data = json.load(f)
+            data = self._read_characters_data()
 
             for char_data in data:
                 try:
@@ -115,6 +185,7 @@ class Simulation:
                             )
                             char.llm_client = None
 
+                    char.uid = len(self.characters)
                     self.characters.append(char)
                     logger.info(f"Loaded character: {char.profile.name}")
                 except Exception as e:
@@ -126,12 +197,10 @@ class Simulation:
         """初始化规范 ID 映射系统"""
         try:
             # 加载角色数据
-            with open(self.humanity_path, "r", encoding="utf-8") as f:
-                characters_data = json.load(f)
+            characters_data = self._read_characters_data()
 
             # 加载位置数据
-            with open("data/locations.json", "r", encoding="utf-8") as f:
-                locations_data = json.load(f)
+            locations_data = load_locations_data()
 
             # 初始化 ID 映射
             manager = init_id_mappings(characters_data, locations_data)
@@ -162,29 +231,24 @@ class Simulation:
 
     def _init_homes(self):
         # 将住宅按环形布局放置在小镇广场周围
-        center_x = 400
-        center_y = 300
-        radius = 250
-
         # 按住所分组居民
         residences = {}
 
+        # 计算任务的目标日期（所有居民相同，只格式化一次）
+        target_date = self.game_time.current_time + timedelta(days=self.duration_days)
+        weekdays = ["周一", "周二", "周三", "周四", "周五", "周六", "周日"]
+        wd = weekdays[target_date.weekday()]
+        target_date_str = f"{target_date.strftime('%Y年%m月%d日')} {wd}"
+
         for char in self.characters:
             # 处理配置中的通用任务（如果有）
             if char.profile.mission:
                 try:
-                    # 计算目标日期
-                    target_date = self.game_time.current_time + timedelta(
-                        days=self.duration_days
-                    )
-                    weekdays = ["周一", "周二", "周三", "周四", "周五", "周六", "周日"]
-                    wd = weekdays[target_date.weekday()]
-                    target_date_str = f"{target_date.strftime('%Y年%m月%d日')} {wd}"
-
                     mission_text = char.profile.mission.format(
                         days=self.duration_days, target_date=target_date_str
                     )
-                    char.add_memory(mission_text)
+                    # 任务是贯穿整个模拟的目标，不随记忆上限被挤出
+                    char.add_memory(mission_text, pinned=True)
                     logger.info(
                         f"Initialized mission for {char.profile.name} from profile: {mission_text}"
                     )
@@ -197,10 +261,9 @@ class Simulation:
                 residences[res_name] = []
             residences[res_name].append(char)
 
-        target_date = self.game_time.current_time + timedelta(days=self.duration_days)
         # 酒馆特殊处理
         # 使用 ID 判断是否为酒馆
-        id_manager = get_id_manager()
+        id_manager = self.id_manager
         
         homes_to_place = []
         for r in residences.keys():
@@ -208,55 +271,45 @@ class Simulation:
             if loc_id != "loc_saloon":
                 homes_to_place.append(r)
                 
-        num_homes = len(homes_to_place)
-
-        angle_step = 2 * math.pi / num_homes if num_homes > 0 else 0
+        coordinates = ring_coordinates(len(homes_to_place))
 
         # 加载住宅描述
         home_desc_config = []
         try:
-            with open("data/locations.json", "r", encoding="utf-8") as f:
-                data = json.load(f)
-                home_desc_config = data.get("home_descriptions", [])
+            home_desc_config = load_locations_data().get("home_descriptions", [])
         except Exception as e:
             logger.error(f"Failed to load home descriptions: {e}")
 
-        for i, home_name in enumerate(homes_to_place):
-            angle = i * angle_step
-            x = int(center_x + radius * math.cos(angle))
-            y = int(center_y + radius * math.sin(angle))
+        # 每条描述的关键词预编译为一个正则，按配置顺序匹配；默认描述只查找一次
+        desc_matchers = []
+        default_desc = None
+        for config in home_desc_config:
+            keywords = config.get("keywords", [])
+            if "default" in keywords:
+                if default_desc is None:
+                    default_desc = config["description"]
+            elif keywords:
+                pattern = re.compile("|".join(map(re.escape, keywords)))
+                desc_matchers.append((pattern, config["description"]))
+
+        for home_name, (x, y) in zip(homes_to_place, coordinates):
+            residents = residences.get(home_name, [])
 
             # 特定住宅的自定义描述，默认回退为名称
             description = f"{home_name}."  # 默认回退
 
-            # 查找匹配的描述
-            found_match = False
-            for config in home_desc_config:
-                keywords = config.get("keywords", [])
-                if "default" in keywords:
-                    continue
-
-                for kw in keywords:
-                    if kw in home_name:
-                        description = config["description"].format(name=home_name)
-                        found_match = True
-                        break
-                if found_match:
-                    break
-
-            if not found_match:
-                # 如果没有匹配则使用默认描述
-                for config in home_desc_config:
-                    if "default" in config.get("keywords", []):
-                        description = config["description"].format(name=home_name)
-                        break
+            # 查找匹配的描述，如果没有匹配则使用默认描述
+            template = next(
+                (desc for pattern, desc in desc_matchers if pattern.search(home_name)),
+                default_desc,
+            )
+            if template is not None:
+                description = template.format(name=home_name)
 
             # Find English name for home
-            english_home_name = None
-            if home_name in residences and residences[home_name]:
-                english_home_name = residences[home_name][
-                    0
-                ].profile.english_home_location
+            english_home_name = (
+                residents[0].profile.english_home_location if residents else None
+            )
 
             # 将地点添加到地图
             loc = Location(
@@ -270,7 +323,6 @@ class Simulation:
 
             # Register home ID if English name is available
             if english_home_name:
-                id_manager = get_id_manager()
                 canonical_id = f"loc_{english_home_name.lower().replace(' ', '_')}"
                 try:
                     id_manager.register_location(
@@ -284,16 +336,16 @@ class Simulation:
             self.game_map.connect_locations(home_name, "小镇广场")
 
             # 更新居住于此的居民坐标
-            if home_name in residences:
-                for char in residences[home_name]:
+            if residents:
+                # 记录规范 ID（住宅 ID 刚刚注册，每个住宅只查找一次）
+                try:
+                    home_loc_id = id_manager.loc_id_from_zh(home_name)
+                except Exception:
+                    home_loc_id = None
+                for char in residents:
                     char.profile.home_location = home_name
                     char.current_location = home_name
-                    # 记录规范 ID
-                    try:
-                        id_manager = get_id_manager()
-                        char.current_location_id = id_manager.loc_id_from_zh(home_name)
-                    except Exception:
-                        pass
+                    char.current_location_id = home_loc_id
                     char.position = (x, y)
 
         # 处理居住在 "酒馆" 的居民
@@ -305,44 +357,80 @@ class Simulation:
                     char.current_location = "酒馆"
                     char.position = saloon.coordinates
 
+    def _init_location_index(self):
+        """按当前位置分组居民，此后由居民移动回调增量维护"""
+        for char in self.characters:
+            self._location_index.setdefault(char.current_location, []).append(char)
+            char.on_move = self._on_character_move
+
+    def _on_character_move(self, char: Character, old: str, new: str):
+        with self._location_lock:
+            chars = self._location_index.get(old)
+            if chars and char in chars:
+                chars.remove(char)
+                if not chars:
+                    del self._location_index[old]
+            chars = self._location_index.setdefault(new, [])
+            # 保持按 uid 排序，与居民列表顺序一致
+            i = next((i for i, c in enumerate(chars) if c.uid > char.uid), len(chars))
+            chars.insert(i, char)
+
     def update(self) -> bool:
         self.game_time.tick(minutes=Config.MINUTES_PER_TICK)
-        sim_time_var.set(self.game_time.get_display_string())
-
-        # 处于最后一天晚上（20点之后）且所有人都睡觉时结束模拟
-        early_end_threshold = self.end_time - timedelta(hours=2)  # 22:00 - 2小时 = 20:00
-        if self.game_time.current_time >= early_end_threshold:
-            all_sleeping = all(char.is_sleeping() for char in self.characters)
-            if all_sleeping:
-                logger.info(
-                    "Simulation finished: All characters are sleeping on the last day."
-                )
-                return False
+        # 本 tick 内产生的日志（包括派生的对话线程）都带上当前模拟时间
+        with logger.contextualize(sim_time=self.game_time.get_display_string()):
+            # 处于最后一天晚上（20点之后）且所有人都睡觉时结束模拟
+            if self.game_time.current_time >= self.early_end_time:
+                all_sleeping = all(char.is_sleeping() for char in self.characters)
+                if all_sleeping:
+                    logger.info(
+                        "Simulation finished: All characters are sleeping on the last day."
+                    )
+                    return False
 
-        # 检查是否发生交互
-        self._handle_interactions()
+            # 检查是否发生交互
+            self._handle_interactions()
 
-        for char in self.characters:
-            self._update_character(char)
+            # 本 tick 内所有需要规划的居民一起并发请求
+            ready = [char for char in self.characters if self._needs_planning(char)]
+            if ready:
+                self._plan_character_actions_async(ready)
 
-        return True
+            return True
 
     def stop(self):
         """停止模拟并保存日志。"""
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._executor.shutdown(wait=False)
         path = self.logger.save()
         if path:
             logger.info(f"Simulation logs saved to {path}")
 
     def _handle_interactions(self):
-        # 按位置分组居民
-        chars_at_loc = {}
-        for char in self.characters:
-            if char.current_location not in chars_at_loc:
-                chars_at_loc[char.current_location] = []
-            chars_at_loc[char.current_location].append(char)
+        # 不再被查询的居民对不会随查随删，定期整体清理一次，避免长时间运行时持续增长
+        now = self.game_time.minutes
+        if now >= self._next_cooldown_sweep:
+            self._next_cooldown_sweep = (
+                now + COOLDOWN_SWEEP_TICKS * Config.MINUTES_PER_TICK
+            )
+            self.interaction_cooldowns = {
+                k: v for k, v in self.interaction_cooldowns.items() if v > now
+            }
+
+        # 按位置分组的居民索引随移动增量维护，这里只复制至少有两人的地点
+        with self._location_lock:
+            crowded = [
+                list(chars)
+                for chars in self._location_index.values()
+                if len(chars) >= 2
+            ]
+        # 夜间居民大多各自在家，没有任何地点聚集两人以上时直接跳过
+        if not crowded:
+            return
 
-        for loc, chars in chars_at_loc.items():
-            if len(chars) < 2:
+        for chars in crowded:
+            # 避免持续交谈：先按地点掷骰，未通过时无需筛选居民与检查冷却
+            if random.random() < (1.0 - Config.INTERACTION_PROBABILITY):
                 continue
 
             # 查找可以交谈的两人
@@ -356,17 +444,13 @@ class Simulation:
                 c2 = available_chars[1]
 
                 # 检查冷却时间
-                pair_key = tuple(sorted((c1.profile.name, c2.profile.name)))
-                if pair_key in self.interaction_cooldowns:
-                    if (
-                        self.game_time.current_time
-                        < self.interaction_cooldowns[pair_key]
-                    ):
+                pair_key = (c1.uid, c2.uid) if c1.uid < c2.uid else (c2.uid, c1.uid)
+                cooldown_until = self.interaction_cooldowns.get(pair_key)
+                if cooldown_until is not None:
+                    if now < cooldown_until:
                         continue
-
-                # 避免持续交谈
-                if random.random() < (1.0 - Config.INTERACTION_PROBABILITY):
-                    continue
+                    # 已过期的冷却随查随删
+                    del self.interaction_cooldowns[pair_key]
 
                 # 触发对话
                 self._trigger_conversation(c1, c2)
@@ -378,21 +462,18 @@ class Simulation:
                 if len(chars) >= 3:
                     cooldown_minutes = 15
                 
-                self.interaction_cooldowns[pair_key] = (
-                    self.game_time.current_time
-                    + timedelta(minutes=cooldown_minutes)
-                )
+                self.interaction_cooldowns[pair_key] = now + cooldown_minutes
 
-    def _build_context_info(self, exclude_char: Character = None):
-        """构建位置和其他居民的上下文信息，用于 LLM 提示。
-
-        Args:
-            exclude_char: 要排除的角色（通常是当前规划的角色）
+    def _get_static_tables(self) -> Tuple[str, str]:
+        """获取地点描述与动作列表（静态表格，整个模拟期间只构建一次）
 
         Returns:
-            tuple: (locations_str, other_locs_str)
+            tuple: (locations_str, actions_str)
         """
-        id_manager = get_id_manager()
+        id_manager = self.id_manager
+        key = (self.game_map.version, len(id_manager.actions))
+        if key == self._static_tables_key:
+            return self._static_tables
 
         # 构建位置描述
         location_descriptions = []
@@ -402,20 +483,57 @@ class Simulation:
                 loc_name_display = f"{loc_id} ({name})"
             else:
                 loc_name_display = (
-                    f"{loc.english_name} ({name})"
-                    if getattr(loc, "english_name", None)
-                    else name
+                    f"{loc.english_name} ({name})" if loc.english_name else name
                 )
             location_descriptions.append(f"- {loc_name_display}: {loc.description}")
-        locations_str = "\n".join(location_descriptions)
 
-        # 构建其他居民的位置和状态
-        other_locs = []
-        for c in self.characters:
-            # 如果指定了排除角色，则跳过该角色
-            if exclude_char and c.profile.name == exclude_char.profile.name:
-                continue
+        # 构建动作列表
+        actions_list = []
+        for act in id_manager.actions.records:
+            actions_list.append(f"- {act.canonical_id} ({act.en_name}/{act.zh_name})")
+
+        self._static_tables = (
+            "\n".join(location_descriptions),
+            "\n".join(actions_list),
+        )
+        self._static_tables_key = key
+        return self._static_tables
 
+    def _build_context_info(self, exclude_char: Character = None):
+        """构建位置和其他居民的上下文信息，用于 LLM 提示。
+
+        Args:
+            exclude_char: 要排除的角色（通常是当前规划的角色）
+
+        Returns:
+            tuple: (locations_str, other_locs_str)
+        """
+        locations_str, _ = self._get_static_tables()
+
+        rows, index = self._get_status_rows()
+        # 如果指定了排除角色，则去掉该角色所在的行
+        i = index.get(exclude_char.profile.name) if exclude_char else None
+        if i is not None:
+            rows = rows[:i] + rows[i + 1 :]
+
+        other_locs_str = "\n".join(rows)
+        return locations_str, other_locs_str
+
+    def _get_status_rows(self) -> Tuple[List[str], Dict[str, int]]:
+        """所有居民的位置和状态行，每个 tick 只构建一次，供本 tick 的所有请求共用
+
+        Returns:
+            tuple: (行列表, 居民名 -> 行号)
+        """
+        now = self.game_time.current_time
+        board = self._status_board
+        if board is not None and board[0] == now:
+            return board[1], board[2]
+
+        # 构建所有居民的位置和状态
+        rows = []
+        index = {}
+        for c in self.characters:
             c_name_display = (
                 f"{c.profile.english_name} ({c.profile.name})"
                 if c.profile.english_name
@@ -423,16 +541,16 @@ class Simulation:
             )
             c_loc = self.game_map.get_location(c.current_location)
             c_loc_name = c.current_location
-            if c_loc and getattr(c_loc, "english_name", None):
+            if c_loc and c_loc.english_name:
                 c_loc_name = f"{c_loc.english_name} ({c.current_location})"
 
-            status_summary = (
-                c.status.split("(")[0].strip() if "(" in c.status else c.status
+            index[c.profile.name] = len(rows)
+            rows.append(
+                f"- {c_name_display}: {c_loc_name} [{_status_summary(c.status)}]"
             )
-            other_locs.append(f"- {c_name_display}: {c_loc_name} [{status_summary}]")
 
-        other_locs_str = "\n".join(other_locs)
-        return locations_str, other_locs_str
+        self._status_board = (now, rows, index)
+        return rows, index
 
     def _trigger_conversation(self, c1: Character, c2: Character):
         logger.info(f"{c1.profile.name} 开始与 {c2.profile.name} 对话")
@@ -449,18 +567,20 @@ class Simulation:
 
         # 异步处理对话
         current_sim_time = self.game_time.get_display_string()
-        thread = threading.Thread(
-            target=self._conversation_thread, args=(c1, c2, current_sim_time)
+        # 对话作为协程提交到常驻事件循环，与规划请求及其他对话并发执行
+        asyncio.run_coroutine_threadsafe(
+            self._conversation_task(c1, c2, current_sim_time), self._loop
         )
-        thread.daemon = True
-        thread.start()
 
-    def _conversation_thread(self, c1: Character, c2: Character, sim_time: str):
-        sim_time_var.set(sim_time)
+    async def _conversation_task(self, c1: Character, c2: Character, sim_time: str):
+        # 协程在事件循环线程中运行，需重新绑定模拟时间
+        with logger.contextualize(sim_time=sim_time):
+            await self._converse(c1, c2)
+
+    async def _converse(self, c1: Character, c2: Character):
+        # C2 的回复依赖 C1 的发言，两次请求在同一协程内串行
         try:
-            id_manager = get_id_manager()
-            c1_id = id_manager.char_id_from_zh(c1.profile.name)
-            c2_id = id_manager.char_id_from_zh(c2.profile.name)
+            id_manager = self.id_manager
 
             c1_name_display = (
                 f"{c1.profile.english_name} ({c1.profile.name})"
@@ -479,90 +599,71 @@ class Simulation:
             loc = self.game_map.get_location(c1.current_location)
             loc_name_display = (
                 f"{loc.english_name} ({c1.current_location})"
-                if loc and getattr(loc, "english_name", None)
+                if loc and loc.english_name
                 else c1.current_location
             )
             loc_id = id_manager.loc_id_from_zh(c1.current_location)
 
-            # 为 C1 生成对话
-            system_prompt_c1 = DIALOGUE_SYSTEM_PROMPT.format(
-                name=c1_name_display,
-                char_id=c1_id,
-                personality=c1.profile.personality,
-                relationships=c1.profile.relationships,
-                locations=locations_str,
-                other_characters_locations=other_locs_str,
-            )
-
-            user_prompt_c1 = DIALOGUE_USER_PROMPT.format(
-                date=self.game_time.get_day_string(),
-                time=self.game_time.get_time_string(),
-                location=loc_name_display,
-                location_id=loc_id,
-                target_name=c2_name_display,
-                context=f"You met {c2_name_display} at {loc_name_display}. It is {self.game_time.get_full_timestamp()}.",
-                memory="\n".join(c1.memory),
-            )
+            # 静态系统提示词两人共用，各自的档案放在上下文消息中
+            system_prompt = build_static_dialogue_system(locations_str)
 
-            client_c1 = c1.llm_client or self.llm_client
-            response_c1 = client_c1.get_json_completion(
-                user_prompt_c1, system_prompt=system_prompt_c1
-            )
-            content_c1 = "..."
-            try:
-                response_json = json.loads(response_c1)
-                validated_response = LLMResponseValidator.validate_dialogue_response(
-                    response_json
+            fused = None
+            if Config.FUSED_DIALOGUE_ENABLED:
+                fused = await self._fused_dialogue(
+                    c1, c2, locations_str, other_locs_str, loc_name_display, loc_id
                 )
-                content_c1 = validated_response.get("content", "...")
-            except (json.JSONDecodeError, ValueError) as e:
-                logger.warning(
-                    f"Failed to validate dialogue response for {c1.profile.name}: {e}"
+            if fused:
+                content_c1, content_c2 = fused
+            else:
+                # 为 C1 生成对话
+                _, context_c1 = self._get_profile_contexts(c1)
+
+                user_prompt_c1 = DIALOGUE_USER_PROMPT.format(
+                    date=self.game_time.get_day_string(),
+                    time=self.game_time.get_time_string(),
+                    location=loc_name_display,
+                    location_id=loc_id,
+                    target_name=c2_name_display,
+                    other_characters_locations=other_locs_str,
+                    context=f"You met {c2_name_display} at {loc_name_display}. It is {self.game_time.get_full_timestamp()}.",
+                    memory=c1.memory_text,
                 )
-                try:
-                    content_c1 = json.loads(response_c1).get("content", "...")
-                except:
-                    pass
 
-            # 为 C2 生成对话（基于 C1 的内容）
-            system_prompt_c2 = DIALOGUE_SYSTEM_PROMPT.format(
-                name=c2_name_display,
-                char_id=c2_id,
-                personality=c2.profile.personality,
-                relationships=c2.profile.relationships,
-                locations=locations_str,
-                other_characters_locations=other_locs_str,
-            )
-
-            user_prompt_c2 = DIALOGUE_USER_PROMPT.format(
-                date=self.game_time.get_day_string(),
-                time=self.game_time.get_time_string(),
-                location=loc_name_display,
-                location_id=loc_id,
-                target_name=c1_name_display,
-                context=f"You met {c1_name_display} at {loc_name_display}. {c1_name_display} said: '{content_c1}'",
-                memory="\n".join(c2.memory),
-            )
-
-            client_c2 = c2.llm_client or self.llm_client
-            response_c2 = client_c2.get_json_completion(
-                user_prompt_c2, system_prompt=system_prompt_c2
-            )
-            content_c2 = "..."
-            try:
-                response_json = json.loads(response_c2)
-                validated_response = LLMResponseValidator.validate_dialogue_response(
-                    response_json
+                client_c1 = c1.llm_client or self.llm_client
+                response_c1 = await self._stream_dialogue(
+                    c1,
+                    client_c1,
+                    user_prompt_c1,
+                    system_prompt,
+                    context_c1,
+                    status_prefix=f"对 {c2.profile.name} 说: ",
                 )
-                content_c2 = validated_response.get("content", "...")
-            except (json.JSONDecodeError, ValueError) as e:
-                logger.warning(
-                    f"Failed to validate dialogue response for {c2.profile.name}: {e}"
+                content_c1 = self._parse_dialogue_content(c1, response_c1)
+
+                # 为 C2 生成对话（基于 C1 的内容）
+                _, context_c2 = self._get_profile_contexts(c2)
+
+                user_prompt_c2 = DIALOGUE_USER_PROMPT.format(
+                    date=self.game_time.get_day_string(),
+                    time=self.game_time.get_time_string(),
+                    location=loc_name_display,
+                    location_id=loc_id,
+                    target_name=c1_name_display,
+                    other_characters_locations=other_locs_str,
+                    context=f"You met {c1_name_display} at {loc_name_display}. {c1_name_display} said: '{content_c1}'",
+                    memory=c2.memory_text,
                 )
-                try:
-                    content_c2 = json.loads(response_c2).get("content", "...")
-                except:
-                    pass
+
+                client_c2 = c2.llm_client or self.llm_client
+                response_c2 = await self._stream_dialogue(
+                    c2,
+                    client_c2,
+                    user_prompt_c2,
+                    system_prompt,
+                    context_c2,
+                    status_prefix=f"回复 {c1.profile.name} 说: ",
+                )
+                content_c2 = self._parse_dialogue_content(c2, response_c2)
 
             # 更新状态以便显示
             c1.status = f"对 {c2.profile.name} 说: {content_c1}"
@@ -595,8 +696,8 @@ class Simulation:
 
             # 保持忙碌一段时间
             duration = Config.CONVERSATION_BUSY_DURATION
-            c1.busy_until = self.game_time.current_time + timedelta(minutes=duration)
-            c2.busy_until = self.game_time.current_time + timedelta(minutes=duration)
+            c1.busy_until = self.game_time.minutes + duration
+            c2.busy_until = self.game_time.minutes + duration
 
         except Exception as e:
             logger.error(f"Error in conversation: {e}")
@@ -604,100 +705,311 @@ class Simulation:
             c1.is_thinking = False
             c2.is_thinking = False
 
-    def _update_character(self, char: Character):
-        if char.busy_until and self.game_time.current_time < char.busy_until:
-            return
-
-        if char.is_thinking:
-            return
+    async def _fused_dialogue(
+        self,
+        c1: Character,
+        c2: Character,
+        locations_str: str,
+        other_locs_str: str,
+        loc_name_display: str,
+        loc_id: str,
+    ) -> Optional[Tuple[str, str]]:
+        """
+        一次请求同时生成两人的发言（C1 先说，C2 回复）
 
-        # 行为规划
-        self._plan_character_action_async(char)
+        Returns:
+            (C1 的发言, C2 的发言)；响应缺失或无法解析时返回 None，由调用方回退为两次请求
+        """
+        id_manager = self.id_manager
+        speakers = []
+        for role, char in (("c1", c1), ("c2", c2)):
+            speakers.append(
+                DIALOGUE_PAIR_SPEAKER_PROMPT.format(
+                    role=role,
+                    name=(
+                        f"{char.profile.english_name} ({char.profile.name})"
+                        if char.profile.english_name
+                        else char.profile.name
+                    ),
+                    char_id=id_manager.char_id_from_zh(char.profile.name),
+                    personality=char.profile.personality,
+                    relationships=char.profile.relationships,
+                    memory=char.memory_text,
+                )
+            )
 
-    def _plan_character_action_async(self, char: Character):
-        char.is_thinking = True
-        char.status = "思考中..."
-        current_sim_time = self.game_time.get_display_string()
-        thread = threading.Thread(
-            target=self._plan_character_action_thread, args=(char, current_sim_time)
+        user_prompt = DIALOGUE_PAIR_USER_PROMPT.format(
+            date=self.game_time.get_day_string(),
+            time=self.game_time.get_time_string(),
+            location=loc_name_display,
+            location_id=loc_id,
+            other_characters_locations=other_locs_str,
+            c1=speakers[0],
+            c2=speakers[1],
+        )
+        client = c1.llm_client or self.llm_client
+        response = await client.aget_json_completion(
+            user_prompt, system_prompt=build_static_dialogue_pair_system(locations_str)
         )
-        thread.daemon = True
-        thread.start()
 
-    def _plan_character_action_thread(self, char: Character, sim_time: str):
-        sim_time_var.set(sim_time)
         try:
-            id_manager = get_id_manager()
-            char_id = id_manager.char_id_from_zh(char.profile.name)
-
-            # 构建位置和其他居民的上下文信息
-            locations_str, other_locs_str = self._build_context_info(exclude_char=char)
-
-            # 构建动作列表
-            actions_list = []
-            for act_id, zh in id_manager.actions.id_to_zh.items():
-                en = id_manager.actions.id_to_en.get(act_id, "")
-                actions_list.append(f"- {act_id} ({en}/{zh})")
-            actions_str = "\n".join(actions_list)
-
-            char_name_display = (
-                f"{char.profile.english_name} ({char.profile.name})"
-                if char.profile.english_name
-                else char.profile.name
+            response_json = json_compat.loads(response)
+            contents = tuple(
+                LLMResponseValidator.validate_dialogue_response(response_json[role])[
+                    "content"
+                ]
+                for role in ("c1", "c2")
+            )
+        except (ValueError, KeyError, TypeError, AttributeError) as e:
+            logger.warning(
+                f"Failed to parse fused dialogue for {c1.profile.name} and {c2.profile.name}: {e}"
             )
+            return None
+        return contents
 
-            system_prompt = PLANNING_SYSTEM_PROMPT.format(
-                name=char_name_display,
-                char_id=char_id,
-                age=char.profile.age,
-                occupation=char.profile.occupation,
-                personality=char.profile.personality,
-                features=char.profile.features,
-                relationships=char.profile.relationships,
-                locations=locations_str,
-                other_characters_locations=other_locs_str,
-                actions=actions_str,
+    async def _stream_dialogue(
+        self,
+        char: Character,
+        client: LLMClient,
+        user_prompt: str,
+        system_prompt: str,
+        context: str,
+        status_prefix: str,
+    ) -> str:
+        """流式生成对话，边接收边更新居民状态以便 GUI 即时显示已生成的内容"""
+        id_manager = self.id_manager
+        buffer = ""
+        async for delta in client.astream_completion(
+            user_prompt, system_prompt=system_prompt, context=context, json_mode=True
+        ):
+            buffer += delta
+            partial = partial_json_string(buffer, "content")
+            if partial:
+                char.status = f"{status_prefix}{id_manager.normalize_output(partial)}"
+        return buffer or "{}"
+
+    @staticmethod
+    def _parse_dialogue_content(char: Character, response: str) -> str:
+        """解析单人对话响应中的 content
+
+        请求使用 JSON 模式，响应只解析一次；校验失败时退回未规范化的 content，
+        无法解析时返回 "..."。
+        """
+        try:
+            response_json = json_compat.loads_object(response)
+        except ValueError as e:
+            logger.warning(
+                f"Failed to parse dialogue response for {char.profile.name}: {e}"
+            )
+            return "..."
+        if not isinstance(response_json, dict):
+            logger.warning(
+                f"Dialogue response for {char.profile.name} is not a JSON object"
             )
+            return "..."
+        try:
+            return LLMResponseValidator.validate_dialogue_response(response_json)[
+                "content"
+            ]
+        except (ValueError, AttributeError) as e:
+            logger.warning(
+                f"Failed to validate dialogue response for {char.profile.name}: {e}"
+            )
+            return response_json.get("content", "...")
 
-            # 检查是否有公告板内容
-            context_extra = ""
-            # 使用 ID 判断是否在小镇广场
-            if char.current_location_id == "loc_town_square":
-                square = self.game_map.get_location("小镇广场")
-                if square and square.notices:
-                    notices_text = "\n".join(
-                        [
-                            f"- [{n.created_at}] {n.author}: {n.content}"
-                            for n in square.notices
-                        ]
-                    )
-                    context_extra = f"\n\nCommunity Board Notices:\n{notices_text}"
+    def _needs_planning(self, char: Character) -> bool:
+        if char.busy_until is not None and self.game_time.minutes < char.busy_until:
+            return False
+
+        return not char.is_thinking
 
-            current_loc = self.game_map.get_location(char.current_location)
-            current_loc_name = char.current_location
-            if current_loc and current_loc.english_name:
-                current_loc_name = (
-                    f"{current_loc.english_name} ({char.current_location})"
+    def _plan_character_actions_async(self, chars: List[Character]):
+        for char in chars:
+            char.is_thinking = True
+            char.status = "思考中..."
+        current_sim_time = self.game_time.get_display_string()
+        asyncio.run_coroutine_threadsafe(
+            self._plan_character_actions(chars, current_sim_time), self._loop
+        )
+
+    async def _plan_character_actions(self, chars: List[Character], sim_time: str):
+        # 协程在事件循环线程中运行，需重新绑定模拟时间；gather 的子任务会继承该上下文
+        with logger.contextualize(sim_time=sim_time):
+            requests = [None] * len(chars)
+            responses = [None] * len(chars)
+            if (
+                Config.PLANNING_BATCH_ENABLED
+                and len(chars) >= Config.PLANNING_BATCH_MIN_SIZE
+            ):
+                requests, responses = await self._plan_batched(chars)
+
+            await asyncio.gather(
+                *(
+                    self._plan_character_action(char, request, response)
+                    for char, request, response in zip(chars, requests, responses)
                 )
+            )
 
-            loc_id = id_manager.loc_id_from_zh(char.current_location)
+    async def _plan_batched(self, chars: List[Character]):
+        """
+        将同一 LLM 客户端的多个居民规划打包为一次请求
 
-            user_prompt = PLANNING_USER_PROMPT.format(
-                date=self.game_time.get_day_string(),
-                time=self.game_time.get_time_string(),
-                location=current_loc_name,
-                location_id=loc_id,
-                memory="\n".join(char.memory) + context_extra,
+        Returns:
+            (规划请求列表, 响应列表)，与 chars 一一对应；
+            构建失败或批量响应中缺失的项为 None，由调用方逐个回退
+        """
+        requests = []
+        for char in chars:
+            try:
+                requests.append(self._build_planning_request(char))
+            except Exception as e:
+                logger.error(f"Error building plan for {char.profile.name}: {e}")
+                requests.append(None)
+
+        # 按客户端分组，只有同一客户端的请求可以合并
+        groups = {}
+        for i, request in enumerate(requests):
+            if request:
+                groups.setdefault(id(request["client"]), []).append(i)
+
+        responses = [None] * len(chars)
+        for indices in groups.values():
+            if len(indices) < Config.PLANNING_BATCH_MIN_SIZE:
+                continue
+            first = requests[indices[0]]
+            logger.info(f"Planning for {len(indices)} residents in one batch...")
+            results = await first["client"].aget_json_completions_batched(
+                [
+                    requests[i]["context"]
+                    + PLANNING_USER_PROMPT.format(**requests[i]["slots"])
+                    for i in indices
+                ],
+                system_prompt=first["system_prompt"],
             )
+            for i, result in zip(indices, results):
+                responses[i] = result
+        return requests, responses
+
+    def _get_profile_contexts(self, char: Character) -> Tuple[str, str]:
+        """
+        居民档案上下文（身份与人设）
 
-            logger.info(f"Planning for {char.profile.name}...")
-            client = char.llm_client or self.llm_client
-            response = client.get_json_completion(
-                user_prompt, system_prompt=system_prompt
+        只包含跨 tick 不变的内容，连同静态系统提示词构成稳定的请求前缀；
+        其他居民的实时位置放在用户消息中。
+
+        Returns:
+            tuple: (规划上下文, 对话上下文)
+        """
+        contexts = self._profile_contexts.get(char.profile.name)
+        if contexts is None:
+            char_id = self.id_manager.char_id_from_zh(char.profile.name)
+            char_name_display = (
+                f"{char.profile.english_name} ({char.profile.name})"
+                if char.profile.english_name
+                else char.profile.name
             )
+            contexts = self._profile_contexts[char.profile.name] = (
+                PLANNING_CONTEXT_PROMPT.format(
+                    name=char_name_display,
+                    char_id=char_id,
+                    age=char.profile.age,
+                    occupation=char.profile.occupation,
+                    personality=char.profile.personality,
+                    features=char.profile.features,
+                    relationships=char.profile.relationships,
+                ),
+                DIALOGUE_CONTEXT_PROMPT.format(
+                    name=char_name_display,
+                    char_id=char_id,
+                    personality=char.profile.personality,
+                    relationships=char.profile.relationships,
+                ),
+            )
+        return contexts
+
+    def _build_planning_request(self, char: Character) -> dict:
+        """构建单个居民的规划请求（提示词、槽位与结构化缓存键）"""
+        id_manager = self.id_manager
+        char_id = id_manager.char_id_from_zh(char.profile.name)
+
+        # 构建其他居民的上下文信息；地点与动作表格整个模拟期间复用
+        _, other_locs_str = self._build_context_info(exclude_char=char)
+        locations_str, actions_str = self._get_static_tables()
+
+        system_prompt = build_static_planning_system(actions_str, locations_str)
+        context, _ = self._get_profile_contexts(char)
+
+        # 检查是否有公告板内容
+        context_extra = ""
+        # 使用 ID 判断是否在小镇广场
+        if char.current_location_id == "loc_town_square":
+            square = self.game_map.get_location("小镇广场")
+            if square and square.notices:
+                notices_text = "\n".join(
+                    [
+                        f"- [{n.created_at}] {n.author}: {n.content}"
+                        for n in square.notices
+                    ]
+                )
+                context_extra = f"\n\nCommunity Board Notices:\n{notices_text}"
+
+        current_loc = self.game_map.get_location(char.current_location)
+        current_loc_name = char.current_location
+        if current_loc and current_loc.english_name:
+            current_loc_name = f"{current_loc.english_name} ({char.current_location})"
+
+        loc_id = id_manager.loc_id_from_zh(char.current_location)
+
+        prompt_slots = {
+            "date": self.game_time.get_day_string(),
+            "time": self.game_time.get_time_string(),
+            "location": current_loc_name,
+            "location_id": loc_id,
+            "other_characters_locations": other_locs_str,
+            "memory": char.memory_text + context_extra,
+        }
+
+        return {
+            "client": char.llm_client or self.llm_client,
+            "system_prompt": system_prompt,
+            "context": context,
+            "slots": prompt_slots,
+            # 结构化缓存：以角色、地点、记忆版本以及其他居民位置与公告内容的摘要为关键槽位，
+            # (日期, 小时) 为易变槽位：跨天或跨小时只算近似命中，由 LLM 微调易变字段
+            "slot_key": (
+                char_id,
+                loc_id,
+                char.memory_revision,
+                hash(other_locs_str),
+                hash(context_extra),
+            ),
+            "variant": (
+                self.game_time.current_time.date(),
+                self.game_time.current_time.hour,
+            ),
+        }
+
+    async def _plan_character_action(
+        self, char: Character, request: dict = None, response: str = None
+    ):
+        try:
+            id_manager = self.id_manager
+            if request is None:
+                request = self._build_planning_request(char)
+
+            if response is None:
+                logger.info(f"Planning for {char.profile.name}...")
+                response = await request["client"].aget_json_completion_templated(
+                    PLANNING_USER_PROMPT,
+                    request["slots"],
+                    system_prompt=request["system_prompt"],
+                    slot_key=request["slot_key"],
+                    variant=request["variant"],
+                    context=request["context"],
+                )
 
             try:
-                plan = json.loads(response)
+                plan = json_compat.loads_object(response)
 
                 # 使用验证器验证和转换 LLM 响应
                 # 这会自动将 target_location ID 转换为中文名称
@@ -723,8 +1035,7 @@ class Simulation:
 
                     # 尝试从 ID 转换
                     if target_location_input.startswith("loc_"):
-                        manager = get_id_manager()
-                        converted_loc = manager.loc_zh_from_id(target_location_input)
+                        converted_loc = id_manager.loc_zh_from_id(target_location_input)
                         target_location = (
                             converted_loc if converted_loc else target_location_input
                         )
@@ -773,10 +1084,8 @@ class Simulation:
                             author=char.profile.name,
                             created_at=self.game_time.get_full_timestamp(),
                         )
-                        square.notices.insert(0, new_notice)  # 最新在最前
-                        # 限制公告数量
-                        if len(square.notices) > 5:
-                            square.notices = square.notices[:5]
+                        # 最新在最前，限制公告数量为 5 条
+                        square.notices = [new_notice, *square.notices[:4]]
                         logger.info(f"Notice posted by {char.profile.name}: {dialogue}")
 
                 # 获取显示名称
@@ -785,9 +1094,7 @@ class Simulation:
                 char.status = f"{action_display} ({dialogue})"
                 # 确保只使用一个表情符号
                 char.emoji = emoji[0] if emoji else "👤"
-                char.busy_until = self.game_time.current_time + timedelta(
-                    minutes=duration
-                )
+                char.busy_until = self.game_time.minutes + duration
 
                 logger.info(
                     f"{char.profile.name}: {action_display} @ {target_location} for {duration}m | Dialogue: {dialogue}"
@@ -813,19 +1120,28 @@ class Simulation:
                     # 一天仅优化一次
                     if char.last_optimized_date != current_date_str:
                         logger.info(f"Optimizing memory for {char.profile.name}...")
-                        char.optimize_memory(self.llm_client, current_date_str)
+                        await asyncio.to_thread(
+                            char.optimize_memory, self.llm_client, current_date_str
+                        )
+                # 白天记忆增长过多时提前压缩，避免提示词随当天事件无限变长
+                elif char.needs_compaction():
+                    logger.info(f"Compacting memory for {char.profile.name}...")
+                    await asyncio.to_thread(
+                        char.compact_memory,
+                        self.llm_client,
+                        self.game_time.get_day_string(),
+                    )
 
             except json.JSONDecodeError:
                 logger.error(
                     f"Failed to parse LLM response for {char.profile.name}: {response}"
                 )
-                char.busy_until = self.game_time.current_time + timedelta(
-                    minutes=Config.PLANNING_RETRY_DELAY * 2
-                )  # 稍后重试
+                # 稍后重试
+                char.busy_until = (
+                    self.game_time.minutes + Config.PLANNING_RETRY_DELAY * 2
+                )
         except Exception as e:
-            logger.error(f"Error in planning thread for {char.profile.name}: {e}")
-            char.busy_until = self.game_time.current_time + timedelta(
-                minutes=Config.PLANNING_RETRY_DELAY
-            )
+            logger.error(f"Error in planning for {char.profile.name}: {e}")
+            char.busy_until = self.game_time.minutes + Config.PLANNING_RETRY_DELAY
         finally:
             char.is_thinking = False
@@ -1,8 +1,25 @@
+from array import array
+from collections import deque
+from enum import IntFlag
+from functools import lru_cache
 from pydantic import BaseModel, Field
-from typing import Optional, List
+from typing import Callable, Deque, Optional, List, Set, Tuple
 import os
+import re
+import sys
 from loguru import logger
 
+from src.ai.cache import embed_text, quantize, similarity
+from src.ai.prompts import (
+    MEMORY_COMPACTION_SYSTEM_PROMPT,
+    MEMORY_COMPACTION_USER_PROMPT,
+    MEMORY_OPTIMIZATION_CONTEXT_PROMPT,
+    MEMORY_OPTIMIZATION_SYSTEM_PROMPT,
+    MEMORY_OPTIMIZATION_USER_PROMPT,
+)
+from src.config import Config
+from src.core.id_mapper import get_id_manager
+
 
 class CharacterProfile(BaseModel):
     name: str
@@ -23,21 +40,124 @@ class CharacterProfile(BaseModel):
     )
 
 
+class ActivityState(IntFlag):
+    """由状态文本推断出的活动类别，一条状态可同时属于多个类别"""
+
+    NONE = 0
+    SLEEP = 1
+    TALK = 2
+    WORK = 4
+    EAT = 8
+    THINK = 16
+
+
+# 各类别对应的状态关键词（匹配小写后的状态文本）
+_STATE_KEYWORDS = (
+    (ActivityState.SLEEP.value, ("sleep", "睡觉", "bed")),
+    (ActivityState.TALK.value, ("talking", "said", "正在说", "正在与", "对", "回复")),
+    (ActivityState.WORK.value, ("work", "工作")),
+    (ActivityState.EAT.value, ("eat", "breakfast", "吃饭")),
+    (ActivityState.THINK.value, ("think", "思考中")),
+)
+
+
+@lru_cache(maxsize=1024)
+def _status_states(status: str) -> int:
+    """
+    状态文本 -> ActivityState 位掩码（普通 int）
+
+    状态只在规划、对话与移动时改变，而渲染每帧都要判断，
+    按文本缓存后每帧只需一次查表与一次按位与。
+    """
+    s = status.lower()
+    states = 0
+    for flag, keywords in _STATE_KEYWORDS:
+        if any(kw in s for kw in keywords):
+            states |= flag
+    return states
+
+
+# 记忆开头的时间戳，如 "[2025-07-28 10:30] "，去重时忽略
+_MEMORY_TIMESTAMP = re.compile(r"^\[[^\]]*\]\s*")
+
+_SLEEP = ActivityState.SLEEP.value
+_TALK = ActivityState.TALK.value
+_WORK = ActivityState.WORK.value
+_EAT = ActivityState.EAT.value
+_THINK = ActivityState.THINK.value
+
+# 规范化动作 ID -> 该动作本身即意味着的活动类别
+_ACTION_STATES = {
+    "act_sleep": _SLEEP,
+    "act_chat": _TALK,
+    "act_work": _WORK,
+    "act_eat": _EAT,
+}
+
+
 class Character:
+    # 居民对象常驻整个模拟，渲染每帧都要读取状态、表情与位置：
+    # 固定属性槽位省去实例字典，属性访问更快、占用更小
+    __slots__ = (
+        "profile",
+        "current_location",
+        "current_location_id",
+        "status",
+        "emoji",
+        "memory",
+        "memory_revision",
+        "_memory_text",
+        "_memory_text_count",
+        "_recent_memories",
+        "_pinned_memories",
+        "current_plan",
+        "_last_action_id",
+        "_action_mask",
+        "busy_until",
+        "is_thinking",
+        "llm_client",
+        "last_optimized_date",
+        "uid",
+        "on_move",
+        # 住宅坐标，由模拟与回放在运行时设置
+        "position",
+        "render_pos",
+    )
+
     def __init__(self, profile: CharacterProfile):
         self.profile = profile
         self.current_location = profile.home_location
         self.current_location_id = None  # 规范化位置 ID（loc_*），运行时维护
         self.status = "空闲"
         self.emoji = "👤"
-        self.memory: List[str] = []
+        # 原始记忆只保留最近 MEMORY_MAX 条，更早的内容由每日的 optimize_memory 总结；
+        # 总结、备忘与固定记忆（如任务）不计入上限，也不会被挤出
+        self.memory: Deque[str] = deque()
+        # 通过 add_memory(..., pinned=True) 写入、不参与淘汰的记忆
+        self._pinned_memories: Set[str] = set()
+        # 记忆每次变化都递增，供缓存键区分记忆内容（记忆满后条数不再变化）
+        self.memory_revision = 0
+        # 记忆按行拼接的文本及其对应的条数，供提示词直接使用；-1 表示需要重新拼接
+        self._memory_text = ""
+        self._memory_text_count = 0
+        # 最近记录的记忆正文及其量化嵌入向量，用于在写入时去除重复记忆
+        self._recent_memories: Deque[Tuple[str, Tuple[array, float]]] = deque(
+            maxlen=Config.MEMORY_DEDUP_WINDOW
+        )
         self.current_plan: str = ""
-        self.last_action_id: Optional[str] = None  # 规范化动作 ID（act_*）
-        # 结束时间的 datetime 对象
-        self.busy_until: Optional[object] = None
+        self._last_action_id: Optional[str] = None  # 规范化动作 ID（act_*）
+        self._action_mask = 0  # 动作 ID 对应的 ActivityState 位，赋值动作时更新
+        # 忙碌结束的游戏分钟（GameTime.minutes），None 表示空闲
+        self.busy_until: Optional[int] = None
         self.is_thinking: bool = False
         self.llm_client = None
         self.last_optimized_date = None
+        # 在模拟居民列表中的序号，用作交互冷却等内部键
+        self.uid: int = -1
+        # 位置变化回调 (居民, 原位置, 新位置)，由模拟用于维护按地点分组的索引
+        self.on_move: Optional[Callable[["Character", str, str], None]] = None
+        # 渲染器最近一次绘制该居民的屏幕坐标，尚未绘制时为 None
+        self.render_pos: Optional[Tuple[float, float]] = None
 
     def optimize_memory(self, llm_client, current_date_str):
         if not self.memory:
@@ -52,14 +172,10 @@ class Character:
         if len(new_memories) < 3:
             return
 
-        from src.ai.prompts import (
-            MEMORY_OPTIMIZATION_SYSTEM_PROMPT,
-            MEMORY_OPTIMIZATION_USER_PROMPT,
-        )
-
         memories_text = "\n".join(new_memories)
 
-        system_prompt = MEMORY_OPTIMIZATION_SYSTEM_PROMPT.format(name=self.profile.name)
+        system_prompt = MEMORY_OPTIMIZATION_SYSTEM_PROMPT.format()
+        context = MEMORY_OPTIMIZATION_CONTEXT_PROMPT.format(name=self.profile.name)
         user_prompt = MEMORY_OPTIMIZATION_USER_PROMPT.format(
             date=current_date_str, memories=memories_text
         )
@@ -69,23 +185,80 @@ class Character:
             if not client:
                 return
 
-            summary = client.get_completion(user_prompt, system_prompt)
+            summary = client.get_completion(user_prompt, system_prompt, context=context)
 
             # 应用优化后的记忆
             # 保留旧的总结，追加新的总结
-            self.memory = existing_summaries + [f"[{current_date_str} Summary] {summary}"]
+            existing_summaries.append(f"[{current_date_str} Summary] {summary}")
+            self.memory = deque(existing_summaries)
+            self.memory_revision += 1
+            self._memory_text = "\n".join(self.memory)
+            self._memory_text_count = len(self.memory)
             self.last_optimized_date = current_date_str
 
             logger.info(f"Memory optimized for {self.profile.name}. Summary: {summary}")
         except Exception as e:
             logger.error(f"Failed to optimize memory for {self.profile.name}: {e}")
 
+    def _raw_memories(self) -> List[str]:
+        """尚未被总结或压缩的原始记忆（按时间顺序）"""
+        return [m for m in self.memory if "Summary]" not in m and "Memento]" not in m]
+
+    def needs_compaction(self) -> bool:
+        """当天未总结的原始记忆是否已多到需要提前压缩"""
+        return len(self._raw_memories()) > Config.MEMORY_COMPACT_THRESHOLD
+
+    def compact_memory(self, llm_client, current_date_str):
+        """
+        白天记忆过多时，将最早的一段原始记忆压缩为一条备忘（Memento）
+
+        备忘替换原记忆块所在的位置，已有的总结与备忘保持不变；
+        夜间的 optimize_memory 会把备忘与其余记忆一起并入当天的总结。
+        """
+        block = self._raw_memories()[: Config.MEMORY_COMPACT_BLOCK]
+        if len(block) < 2:
+            return
+
+        system_prompt = MEMORY_COMPACTION_SYSTEM_PROMPT.format()
+        context = MEMORY_OPTIMIZATION_CONTEXT_PROMPT.format(name=self.profile.name)
+        user_prompt = MEMORY_COMPACTION_USER_PROMPT.format(
+            date=current_date_str, memories="\n".join(block)
+        )
+
+        try:
+            client = self.llm_client or llm_client
+            if not client:
+                return
+
+            memento = client.get_completion(user_prompt, system_prompt, context=context)
+
+            # 按对象身份替换记忆块：等待 LLM 期间新增的记忆保持不变
+            block_ids = set(map(id, block))
+            compacted = []
+            for m in self.memory:
+                if id(m) not in block_ids:
+                    compacted.append(m)
+                elif id(m) == id(block[0]):
+                    compacted.append(f"[{current_date_str} Memento] {memento}")
+            self.memory = deque(compacted)
+            self.memory_revision += 1
+            self._memory_text = "\n".join(self.memory)
+            self._memory_text_count = len(self.memory)
+
+            logger.info(
+                f"Memory compacted for {self.profile.name}: "
+                f"{len(block)} entries -> memento"
+            )
+        except Exception as e:
+            logger.error(f"Failed to compact memory for {self.profile.name}: {e}")
+
     def move_to(self, location_name: str):
+        previous = self.current_location
         self.current_location = location_name
+        if self.on_move and previous != location_name:
+            self.on_move(self, previous, location_name)
         # 更新规范 ID
         try:
-            from src.core.id_mapper import get_id_manager
-
             loc_id = get_id_manager().loc_id_from_zh(location_name)
             self.current_location_id = loc_id or self.current_location_id
         except Exception:
@@ -97,51 +270,112 @@ class Character:
     def say(self, message: str):
         self.status = f"正在说: {message}"
 
+    @property
+    def activity(self) -> ActivityState:
+        """当前状态文本对应的活动类别"""
+        return ActivityState(_status_states(self.status))
+
+    @property
+    def last_action_id(self) -> Optional[str]:
+        return self._last_action_id
+
+    @last_action_id.setter
+    def last_action_id(self, action_id: Optional[str]):
+        self._last_action_id = action_id
+        self._action_mask = _ACTION_STATES.get(action_id, 0)
+
     def is_sleeping(self) -> bool:
-        if self.last_action_id == "act_sleep":
-            return True
-        s = self.status.lower()
-        return "sleeping" in s or "sleep" in s or "睡觉" in s or "bed" in s
+        return bool((self._action_mask | _status_states(self.status)) & _SLEEP)
 
     def is_talking(self) -> bool:
-        if self.last_action_id == "act_chat":
-            return True
-        s = self.status.lower()
-        return (
-            "talking" in s
-            or "said" in s
-            or "正在说" in s
-            or "正在与" in s
-            or "对" in s
-            or "回复" in s
-        )
+        return bool((self._action_mask | _status_states(self.status)) & _TALK)
 
     def is_working(self) -> bool:
-        if self.last_action_id == "act_work":
-            return True
-        s = self.status.lower()
-        return "working" in s or "work" in s or "工作" in s
+        return bool((self._action_mask | _status_states(self.status)) & _WORK)
 
     def is_eating(self) -> bool:
-        if self.last_action_id == "act_eat":
-            return True
-        s = self.status.lower()
-        return "eating" in s or "eat" in s or "breakfast" in s or "吃饭" in s
+        return bool((self._action_mask | _status_states(self.status)) & _EAT)
 
     def is_thinking_status(self) -> bool:
-        s = self.status.lower()
-        return "think" in s or "thinking" in s or "思考中" in s
+        return bool(_status_states(self.status) & _THINK)
+
+    def _is_duplicate_memory(self, memory: str) -> bool:
+        """与最近的记忆正文相同或语义上几乎相同（使用本地哈希嵌入，不调用模型）"""
+        body = _MEMORY_TIMESTAMP.sub("", memory, count=1)
+        vector = quantize(embed_text(body))
+        threshold = Config.MEMORY_DEDUP_SIMILARITY
+        for recent_body, recent_vector in self._recent_memories:
+            if body == recent_body or similarity(vector, recent_vector) >= threshold:
+                return True
+        self._recent_memories.append((body, vector))
+        return False
+
+    def _is_evictable(self, memory: str) -> bool:
+        """原始记忆可被挤出；总结、备忘与固定记忆是长期记录，始终保留"""
+        return (
+            "Summary]" not in memory
+            and "Memento]" not in memory
+            and memory not in self._pinned_memories
+        )
 
-    def add_memory(self, memory: str):
+    def _evict_oldest_raw(self) -> bool:
+        """原始记忆超过 MEMORY_MAX 条时删除其中最旧的一条，返回是否删除"""
+        if len(self.memory) <= Config.MEMORY_MAX:
+            return False
+        oldest = None
+        count = 0
+        for i, m in enumerate(self.memory):
+            if self._is_evictable(m):
+                if oldest is None:
+                    oldest = i
+                count += 1
+        if count <= Config.MEMORY_MAX:
+            return False
+        del self.memory[oldest]
+        return True
+
+    def add_memory(self, memory: str, pinned: bool = False):
+        """
+        记录一条记忆
+
+        pinned 为 True 的记忆（如居民任务）不会因超出 MEMORY_MAX 被挤出，
+        但仍会在每日总结时并入总结。
+        """
+        if self._is_duplicate_memory(memory):
+            logger.debug(f"Skipped duplicate memory for {self.profile.name}")
+            return
+        self.memory_revision += 1
+        if pinned:
+            self._pinned_memories.add(memory)
         self.memory.append(memory)
+        if self._evict_oldest_raw():
+            # 中间的一条被删除，下次读取时重新拼接
+            self._memory_text_count = -1
+            return
+        if self._memory_text_count == len(self.memory) - 1:
+            self._memory_text = (
+                f"{self._memory_text}\n{memory}" if self._memory_text_count else memory
+            )
+            self._memory_text_count += 1
+
+    @property
+    def memory_text(self) -> str:
+        """记忆按行拼接的文本（等价于 "\\n".join(self.memory)），随 add_memory 增量维护"""
+        if self._memory_text_count != len(self.memory):
+            # 记忆列表被直接修改过，重新拼接
+            self._memory_text = "\n".join(self.memory)
+            self._memory_text_count = len(self.memory)
+        return self._memory_text
 
     @staticmethod
     def from_dict(data: dict) -> "Character":
-        residence = data.get("residence", f"{data.get('name', 'Unknown')}的家")
+        # 居民名与地点名是少量固定字符串，驻留后字典查找与相等比较可走指针快路径
+        name = sys.intern(data.get("name", "Unknown"))
+        residence = sys.intern(data.get("residence", f"{name}的家"))
         english_residence = data.get("english_residence")
         return Character(
             CharacterProfile(
-                name=data.get("name", "Unknown"),
+                name=name,
                 english_name=data.get("english_name"),
                 age=data.get("age", "Unknown"),
                 occupation=data.get("occupation", "Unknown"),
@@ -150,7 +384,7 @@ class Character:
                 relationships=data.get("relationships", "Unknown"),
                 residence=residence,
                 english_residence=english_residence,
-                home_location=data.get("home_location", residence),
+                home_location=sys.intern(data.get("home_location", residence)),
                 english_home_location=data.get(
                     "english_home_location", english_residence
                 ),
@@ -1,10 +1,14 @@
 import pygame
 import sys
 import os
+from datetime import timedelta
 from src.core.simulation import Simulation
 from src.core.replay import ReplaySimulation
 from src.gui.renderer import Renderer
 
+# 回放时方向键每次跳转的游戏时长
+REPLAY_SEEK_STEP = timedelta(minutes=10)
+
 
 class MainWindow:
     def __init__(self, replay_log_path: str = None):
@@ -19,6 +23,9 @@ class MainWindow:
         self.clock = pygame.time.Clock()
         self.running = True
         self.frame_count = 0
+        # 上一帧渲染时的模拟状态；状态未变且没有输入事件时跳过本帧渲染
+        self._dirty = True
+        self._rendered_state = None
 
         # 初始化模拟
         if replay_log_path:
@@ -35,7 +42,9 @@ class MainWindow:
         while self.running:
             self._handle_events()
             self._update()
-            self._render()
+            # 每秒至少重绘一次，兜底未纳入状态签名的变化
+            if self._needs_render() or self.frame_count % 30 == 0:
+                self._render()
             self.clock.tick(30)  # 30 fps
             self.frame_count += 1
 
@@ -47,26 +56,24 @@ class MainWindow:
         sys.exit()
 
     def _handle_events(self):
+        # 拖动窗口时会连续收到多个 VIDEORESIZE，只在本帧末按最后一个尺寸重建一次显示表面
+        resize_to = None
         for event in pygame.event.get():
+            self._dirty = True
             # 将事件传递给 renderer（例如用于缩放）
             self.renderer.handle_event(event)
 
             if event.type == pygame.QUIT:
                 self.running = False
             elif event.type == pygame.VIDEORESIZE:
-                self.width = event.w
-                self.height = event.h
-                self.screen = pygame.display.set_mode(
-                    (self.width, self.height), pygame.RESIZABLE
-                )
-                self.renderer.screen = self.screen
+                resize_to = (event.w, event.h)
             elif event.type == pygame.KEYDOWN:
                 if event.key == pygame.K_r:
                     # 加载最新回放
                     self._load_latest_replay()
 
                 # 回放控制
-                if hasattr(self.simulation, "is_replay") and self.simulation.is_replay:
+                if self.simulation.is_replay:
                     if event.key == pygame.K_SPACE:
                         self.simulation.paused = not self.simulation.paused
                     elif event.key == pygame.K_UP:
@@ -75,12 +82,10 @@ class MainWindow:
                         self.simulation.speed = max(0.5, self.simulation.speed - 0.5)
                     elif event.key == pygame.K_RIGHT:
                         # 向前跳 10 分钟
-                        from datetime import timedelta
-
                         if self.simulation.current_time and self.simulation.end_time:
                             self.simulation.current_time = min(
                                 self.simulation.end_time,
-                                self.simulation.current_time + timedelta(minutes=10),
+                                self.simulation.current_time + REPLAY_SEEK_STEP,
                             )
                             self.simulation.game_time.current_time = (
                                 self.simulation.current_time
@@ -88,12 +93,10 @@ class MainWindow:
                             self.simulation._update_character_states()
                     elif event.key == pygame.K_LEFT:
                         # 向后跳 10 分钟
-                        from datetime import timedelta
-
                         if self.simulation.current_time and self.simulation.start_time:
                             self.simulation.current_time = max(
                                 self.simulation.start_time,
-                                self.simulation.current_time - timedelta(minutes=10),
+                                self.simulation.current_time - REPLAY_SEEK_STEP,
                             )
                             self.simulation.game_time.current_time = (
                                 self.simulation.current_time
@@ -102,7 +105,7 @@ class MainWindow:
 
             elif event.type == pygame.MOUSEBUTTONDOWN:
                 # 检查是否点击了时间轴
-                if hasattr(self.simulation, "is_replay") and self.simulation.is_replay:
+                if self.simulation.is_replay:
                     mx, my = pygame.mouse.get_pos()
                     ui_width = 300
                     map_view_width = self.screen.get_width() - ui_width
@@ -117,24 +120,37 @@ class MainWindow:
                             progress = (mx - bar_x) / bar_w
                             self.simulation.set_time(progress)
 
+        # 尺寸未变化时不重建显示表面
+        if resize_to is not None and resize_to != (self.width, self.height):
+            self.width, self.height = resize_to
+            self.screen = pygame.display.set_mode(
+                (self.width, self.height), pygame.RESIZABLE
+            )
+            self.renderer.screen = self.screen
+
     def _load_latest_replay(self):
         log_dir = "logs"
         if not os.path.exists(log_dir):
             print("No logs directory found.")
             return
 
-        files = [
-            f
-            for f in os.listdir(log_dir)
-            if f.startswith("simulation_log_") and f.endswith(".json")
-        ]
-        if not files:
+        # 名称中包含时间戳，名称最大的即为最新日志；单次遍历，无需排序
+        with os.scandir(log_dir) as entries:
+            latest = max(
+                (
+                    e
+                    for e in entries
+                    if e.name.startswith("simulation_log_")
+                    and e.name.endswith((".json", ".jsonl"))
+                ),
+                key=lambda e: e.name,
+                default=None,
+            )
+        if latest is None:
             print("No log files found.")
             return
 
-        # 按名称排序（名称中包含时间戳）
-        files.sort(reverse=True)
-        latest_log = os.path.join(log_dir, files[0])
+        latest_log = latest.path
         print(f"Loading replay: {latest_log}")
 
         # 如果当前正在运行则停止模拟
@@ -148,14 +164,27 @@ class MainWindow:
     def _update(self):
         # 每 30 帧（1 秒）更新一次模拟
         # 即每真实秒钟推进 1 个游戏分钟（配置可改）
-        if self.frame_count % 30 == 0 or (
-            hasattr(self.simulation, "is_replay") and self.simulation.is_replay
-        ):
+        if self.frame_count % 30 == 0 or self.simulation.is_replay:
             should_continue = self.simulation.update()
             if should_continue is False:
                 # 模拟结束
                 self.running = False
 
+    def _state_signature(self) -> tuple:
+        """画面依赖的模拟状态：游戏时间与每个居民的位置、状态和表情"""
+        sim = self.simulation
+        return (
+            sim.game_time.current_time,
+            tuple((c.current_location, c.status, c.emoji) for c in sim.characters),
+        )
+
+    def _needs_render(self) -> bool:
+        if self._dirty:
+            return True
+        return self._state_signature() != self._rendered_state
+
     def _render(self):
         self.renderer.render()
         pygame.display.flip()
+        self._dirty = False
+        self._rendered_state = self._state_signature()
@@ -1,5 +1,8 @@
 import pygame
 import math
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Optional
 from src.core.simulation import Simulation
 from src.core.map import LocationType
 
@@ -16,6 +19,73 @@ YELLOW = (255, 255, 100)
 DARK_BLUE = (20, 20, 60)  # 夜间颜色
 CYAN = (100, 200, 200)
 
+# 地点类型 -> 地图上的方块颜色（未列出的类型为灰色）
+_LOCATION_COLORS = {
+    LocationType.SQUARE: YELLOW,
+    LocationType.SALOON: RED,
+    LocationType.HOME: BLUE,
+    LocationType.LIBRARY: CYAN,
+}
+
+# 文字表面缓存的条目上限（居民状态、对话与提示框文本会不断变化）
+TEXT_CACHE_MAXSIZE = 512
+# 缩放后表情图标与状态气泡的缓存上限（缩放比例连续变化时每个尺寸一条）
+ICON_CACHE_MAXSIZE = 512
+# 状态文本换行结果的缓存上限
+WRAP_CACHE_MAXSIZE = 256
+
+# 英文动作名 -> 中文显示名（完全匹配优先，其次按前缀替换）
+_SIMPLE_ACTION_NAMES = {
+    "Idle": "空闲",
+    "Thinking...": "思考中...",
+    "Sleep": "睡觉",
+    "Sleeping": "睡觉",
+    "Work": "工作",
+    "Working": "工作",
+    "Eat": "吃饭",
+    "Eating": "吃饭",
+    "Chat": "聊天",
+    "Chatting": "聊天",
+    "Walk": "散步",
+    "Go to": "前往",
+    "Visit": "拜访",
+}
+
+
+@lru_cache(maxsize=1024)
+def _partner_name(status: str) -> Optional[str]:
+    """从对话类状态文本中解析交谈对象的姓名，无法解析时返回 None
+
+    状态只在规划与对话时改变，按文本缓存后每帧只需一次查表。
+    """
+    partner_name = None
+    if "Talking to " in status:
+        partner_name = status.split("Talking to ")[1].replace("...", "")
+    elif "正在与" in status:
+        try:
+            # "正在与 {name} 交谈..."
+            partner_name = status.split("正在与 ")[1].split(" 交谈")[0]
+        except IndexError:
+            pass
+    elif "Said to " in status:
+        try:
+            partner_name = status.split("Said to ")[1].split(":")[0]
+        except IndexError:
+            pass
+    elif "对" in status and "说:" in status:
+        try:
+            # 格式: "对 {name} 说: ..."
+            partner_name = status.split("对 ")[1].split(" 说:")[0]
+        except IndexError:
+            pass
+    elif "回复" in status and "说:" in status:
+        try:
+            # 格式: "回复 {name} 说: ..."
+            partner_name = status.split("回复 ")[1].split(" 说:")[0]
+        except IndexError:
+            pass
+    return partner_name
+
 
 class Renderer:
     def __init__(self, screen: pygame.Surface, simulation: Simulation):
@@ -35,6 +105,29 @@ class Renderer:
         self.is_dragging = False
         self.last_mouse_pos = (0, 0)
 
+        # (字体, 文本, 颜色) -> 已栅格化的文字表面；大多数文字逐帧不变，只需复制
+        self._text_cache: "OrderedDict[tuple, pygame.Surface]" = OrderedDict()
+        # (表情, 宽, 高) -> 缩放到目标尺寸的图标表面
+        self._icon_cache: "OrderedDict[tuple, pygame.Surface]" = OrderedDict()
+        # (表情, 气泡尺寸, 图标宽高, 圆角半径) -> 合成好的状态气泡
+        self._bubble_cache: "OrderedDict[tuple, pygame.Surface]" = OrderedDict()
+        # 状态文本 -> 按面板宽度折好的各行
+        self._wrap_cache: "OrderedDict[str, tuple]" = OrderedDict()
+
+        # 本帧的 (scale, offset_x, offset_y)，每次 render 开始时计算一次，绘制期间共用
+        self._xform = (1.0, 0.0, 0.0)
+        # 本帧地图视图区域（不含右侧面板），完全落在其外的居民与气泡不绘制
+        self._view_rect = pygame.Rect(0, 0, 0, 0)
+
+        # 背景与地图层（地点、标签、连线、公告板）很少变化，缓存在独立表面上整块复制
+        self._map_layer: pygame.Surface = None
+        self._map_layer_key = None
+        # (小镇广场, 公告板矩形)，随地图层一起重建；广场不存在时为 (None, None)
+        self._notice_board = (None, None)
+        # 侧边栏居民状态面板及其对应的 (高度, 各居民姓名与状态)
+        self._panel: pygame.Surface = None
+        self._panel_key = None
+
     def handle_event(self, event):
         if event.type == pygame.MOUSEWHEEL:
             # 缩放（放大/缩小）
@@ -54,7 +147,7 @@ class Renderer:
                 map_view_width = self.screen.get_width() - ui_width
 
                 # 回放条
-                is_replay = hasattr(self.sim, "is_replay") and self.sim.is_replay
+                is_replay = self.sim.is_replay
                 bar_height = 60 if is_replay else 0
                 map_view_height = self.screen.get_height() - bar_height
 
@@ -68,13 +161,17 @@ class Renderer:
 
         elif event.type == pygame.MOUSEMOTION:
             if self.is_dragging:
-                dx = event.pos[0] - self.last_mouse_pos[0]
-                dy = event.pos[1] - self.last_mouse_pos[1]
-                self.pan_offset_x += dx
-                self.pan_offset_y += dy
+                # 拖动时每帧可能收到多个移动事件，各坐标只解包一次
+                last_x, last_y = self.last_mouse_pos
+                x, y = event.pos
+                self.pan_offset_x += x - last_x
+                self.pan_offset_y += y - last_y
                 self.last_mouse_pos = event.pos
 
-    def _translate_status(self, status: str) -> str:
+    @staticmethod
+    @lru_cache(maxsize=1024)
+    def _translate_status(status: str) -> str:
+        """状态文本 -> 界面显示文本；状态很少变化而每帧都要显示，按文本缓存"""
         # 处理 "Action (Dialogue)" 格式
         if "(" in status and status.endswith(")"):
             # 仅在第一个分隔处拆分以防止意外
@@ -82,7 +179,7 @@ class Renderer:
             action = parts[0]
             dialogue = parts[1][:-1]  # 去掉末尾的 )
 
-            action_cn = self._translate_simple_action(action)
+            action_cn = Renderer._translate_simple_action(action)
             return f"{action_cn} ({dialogue})"
 
         if (
@@ -95,24 +192,12 @@ class Renderer:
             return status
 
         # 3. 简单动作翻译
-        return self._translate_simple_action(status)
-
-    def _translate_simple_action(self, action: str) -> str:
-        mapping = {
-            "Idle": "空闲",
-            "Thinking...": "思考中...",
-            "Sleep": "睡觉",
-            "Sleeping": "睡觉",
-            "Work": "工作",
-            "Working": "工作",
-            "Eat": "吃饭",
-            "Eating": "吃饭",
-            "Chat": "聊天",
-            "Chatting": "聊天",
-            "Walk": "散步",
-            "Go to": "前往",
-            "Visit": "拜访",
-        }
+        return Renderer._translate_simple_action(status)
+
+    @staticmethod
+    @lru_cache(maxsize=1024)
+    def _translate_simple_action(action: str) -> str:
+        mapping = _SIMPLE_ACTION_NAMES
 
         # 完全匹配
         if action in mapping:
@@ -154,9 +239,43 @@ class Renderer:
         return scale, offset_x, offset_y
 
     def _transform(self, x, y):
-        scale, off_x, off_y = self._get_transform()
+        scale, off_x, off_y = self._xform
         return int(x * scale + off_x), int(y * scale + off_y)
 
+    def _render_text(self, font: pygame.font.Font, text: str, color) -> pygame.Surface:
+        """抗锯齿渲染文字，结果按 (字体, 文本, 颜色) 做 LRU 缓存；返回的表面只读"""
+        key = (id(font), text, color)
+        surf = self._text_cache.get(key)
+        if surf is None:
+            surf = font.render(text, True, color)
+            self._text_cache[key] = surf
+            if len(self._text_cache) > TEXT_CACHE_MAXSIZE:
+                self._text_cache.popitem(last=False)
+        else:
+            self._text_cache.move_to_end(key)
+        return surf
+
+    def _scaled_icon(self, icon: str, width: int, height: int) -> pygame.Surface:
+        """渲染并缩放表情图标，结果按 (表情, 宽, 高) 做 LRU 缓存；返回的表面只读"""
+        key = (icon, width, height)
+        surf = self._icon_cache.get(key)
+        if surf is None:
+            raw = self._render_text(self.icon_font, icon, BLACK)
+            if raw.get_size() == (width, height):
+                # 目标尺寸与渲染尺寸一致，无需缩放
+                surf = raw
+            else:
+                try:
+                    surf = pygame.transform.smoothscale(raw, (width, height))
+                except ValueError:
+                    surf = pygame.transform.scale(raw, (width, height))
+            self._icon_cache[key] = surf
+            if len(self._icon_cache) > ICON_CACHE_MAXSIZE:
+                self._icon_cache.popitem(last=False)
+        else:
+            self._icon_cache.move_to_end(key)
+        return surf
+
     def _get_emoji_font(self, size: int) -> pygame.font.Font:
         font_names = [
             "Segoe UI Emoji",
@@ -204,20 +323,41 @@ class Renderer:
         # 最后回退选项
         return pygame.font.SysFont("Arial", size, bold=bold)
 
+    def _map_layer_signature(self) -> tuple:
+        """地图层依赖的全部输入；任一变化时重建缓存表面"""
+        game_map = self.sim.game_map
+        return (
+            self.screen.get_size(),
+            self._xform,
+            self.sim.game_time.is_night,
+            id(game_map),
+            game_map.version,
+            tuple(bool(loc.notices) for loc in game_map.locations.values()),
+        )
+
     def render(self):
-        # 根据时间绘制背景
-        if self.sim.game_time.is_night:
-            self.screen.fill(DARK_BLUE)
-        else:
-            self.screen.fill(GREEN)
+        # 缩放、平移与窗口尺寸只会在两帧之间改变
+        self._xform = self._get_transform()
+        self._view_rect = pygame.Rect(
+            0, 0, self.screen.get_width() - 300, self.screen.get_height()
+        )
+        key = self._map_layer_signature()
+        if key != self._map_layer_key:
+            layer = pygame.Surface(self.screen.get_size()).convert()
+            # 根据时间绘制背景
+            layer.fill(DARK_BLUE if self.sim.game_time.is_night else GREEN)
+            self._draw_map(layer)
+            self._notice_board = self._notice_board_hitbox()
+            self._map_layer = layer
+            self._map_layer_key = key
+        self.screen.blit(self._map_layer, (0, 0))
 
-        self._draw_map()
         self._draw_characters()
         self._draw_status_bubbles_pass()
         self._draw_ui()
 
         # 如果处于回放模式，绘制回放控制
-        if hasattr(self.sim, "is_replay") and self.sim.is_replay:
+        if self.sim.is_replay:
             self._render_replay_controls()
 
         self._draw_tooltips()
@@ -258,6 +398,7 @@ class Renderer:
         # 绘制时间文本
         time_str = self.sim.game_time.get_full_timestamp()
         status_str = "PAUSED" if self.sim.paused else "PLAYING"
+        # 回放时间几乎逐帧变化，不进入文字缓存
         text = self.font.render(
             f"回放: {time_str} | {status_str} | 速度: {self.sim.speed:.1f}x",
             True,
@@ -266,47 +407,39 @@ class Renderer:
         self.screen.blit(text, (bar_x, y + 35))
 
         # 绘制控制提示
-        help_text = self.font.render(
-            "[空格] 暂停/播放  [箭头] 查找/速度", True, (100, 100, 100)
+        help_text = self._render_text(
+            self.font, "[空格] 暂停/播放  [箭头] 查找/速度", (100, 100, 100)
         )
         self.screen.blit(help_text, (map_view_width - 300, y + 35))
 
-    def _draw_map(self):
+    def _draw_map(self, surface: pygame.Surface):
         for name, loc in self.sim.game_map.locations.items():
             # 坐标变换
             x, y = self._transform(*loc.coordinates)
 
-            color = GRAY
-            if loc.type == LocationType.SQUARE:
-                color = YELLOW
-            elif loc.type == LocationType.SALOON:
-                color = RED
-            elif loc.type == LocationType.HOME:
-                color = BLUE
-            elif loc.type == LocationType.LIBRARY:
-                color = CYAN
+            color = _LOCATION_COLORS.get(loc.type, GRAY)
 
             # 绘制地点
             # 略微缩放尺寸以保持可读性
-            scale, _, _ = self._get_transform()
+            scale = self._xform[0]
             size = int(60 * scale)
             rect = pygame.Rect(x - size // 2, y - size // 2, size, size)
-            pygame.draw.rect(self.screen, color, rect)
-            pygame.draw.rect(self.screen, BLACK, rect, 2)
+            pygame.draw.rect(surface, color, rect)
+            pygame.draw.rect(surface, BLACK, rect, 2)
 
             # 绘制标签
-            text = self.font.render(
-                name, True, WHITE if self.sim.game_time.is_night else BLACK
+            text = self._render_text(
+                self.font, name, WHITE if self.sim.game_time.is_night else BLACK
             )
             text_rect = text.get_rect(center=(x, y + size // 2 + 10))
-            self.screen.blit(text, text_rect)
+            surface.blit(text, text_rect)
 
             # 绘制连接线
             for connected_name in loc.connected_locations:
                 connected_loc = self.sim.game_map.get_location(connected_name)
                 if connected_loc:
                     cx, cy = self._transform(*connected_loc.coordinates)
-                    pygame.draw.line(self.screen, BLACK, (x, y), (cx, cy), 1)
+                    pygame.draw.line(surface, BLACK, (x, y), (cx, cy), 1)
 
             # 绘制公告板图标（仅在广场）
             if loc.type == LocationType.SQUARE:
@@ -315,13 +448,13 @@ class Renderer:
 
                 # 绘制板子
                 board_rect = pygame.Rect(board_x, board_y, 20 * scale, 15 * scale)
-                pygame.draw.rect(self.screen, (139, 69, 19), board_rect)  # 棕色
-                pygame.draw.rect(self.screen, BLACK, board_rect, 1)
+                pygame.draw.rect(surface, (139, 69, 19), board_rect)  # 棕色
+                pygame.draw.rect(surface, BLACK, board_rect, 1)
 
                 # 如果有公告，画个感叹号
-                if hasattr(loc, "notices") and loc.notices:
-                    excl = self.font.render("!", True, YELLOW)
-                    self.screen.blit(excl, (board_x + 5 * scale, board_y - 15 * scale))
+                if loc.notices:
+                    excl = self._render_text(self.font, "!", YELLOW)
+                    surface.blit(excl, (board_x + 5 * scale, board_y - 15 * scale))
 
     def _draw_characters(self):
         # 按位置分组居民，避免重叠
@@ -337,49 +470,20 @@ class Renderer:
                 continue
 
             base_x, base_y = self._transform(*loc.coordinates)
-            scale, _, _ = self._get_transform()
+            scale = self._xform[0]
 
             # 识别正在交互的居民以分组显示
             interactions = {}
             processed = set()
+            by_name = {c.profile.name: c for c in chars}
 
             for char in chars:
                 if char in processed:
                     continue
 
-                partner_name = None
-                if "Talking to " in char.status:
-                    partner_name = char.status.split("Talking to ")[1].replace(
-                        "...", ""
-                    )
-                elif "正在与" in char.status:
-                    try:
-                        # "正在与 {name} 交谈..."
-                        partner_name = char.status.split("正在与 ")[1].split(" 交谈")[0]
-                    except IndexError:
-                        pass
-                elif "Said to " in char.status:
-                    try:
-                        partner_name = char.status.split("Said to ")[1].split(":")[0]
-                    except IndexError:
-                        pass
-                elif "对" in char.status and "说:" in char.status:
-                    try:
-                        # 格式: "对 {name} 说: ..."
-                        partner_name = char.status.split("对 ")[1].split(" 说:")[0]
-                    except IndexError:
-                        pass
-                elif "回复" in char.status and "说:" in char.status:
-                    try:
-                        # 格式: "回复 {name} 说: ..."
-                        partner_name = char.status.split("回复 ")[1].split(" 说:")[0]
-                    except IndexError:
-                        pass
-
+                partner_name = _partner_name(char.status)
                 if partner_name:
-                    partner = next(
-                        (c for c in chars if c.profile.name == partner_name), None
-                    )
+                    partner = by_name.get(partner_name)
                     if partner and partner not in processed:
                         interactions[char] = partner
                         processed.add(char)
@@ -439,28 +543,28 @@ class Renderer:
     def _draw_single_char(self, char, char_x, char_y, scale):
         char.render_pos = (char_x, char_y)
 
-        # 绘制居民图标
-        icon = char.profile.icon
-        text = self.icon_font.render(icon, True, BLACK)
+        # 背景圆完全在视图外（平移或放大后）时跳过绘制，绘制位置仍照常记录
+        radius = 10 * scale
+        if not self._view_rect.colliderect(
+            (char_x - radius, char_y - radius, 2 * radius, 2 * radius)
+        ):
+            return
 
+        # 绘制居民图标
         # 动态缩放图标以适配圆形背景
         target_size = max(1, int(15 * scale))
-        try:
-            text = pygame.transform.smoothscale(text, (target_size, target_size))
-        except ValueError:
-            text = pygame.transform.scale(text, (target_size, target_size))
+        text = self._scaled_icon(char.profile.icon, target_size, target_size)
 
         text_rect = text.get_rect(center=(char_x, char_y))
 
         # 绘制背景圆以提升可见性
-        radius = 10 * scale
         pygame.draw.circle(self.screen, WHITE, (char_x, char_y), radius)
         pygame.draw.circle(self.screen, BLACK, (char_x, char_y), radius, 1)
 
         self.screen.blit(text, text_rect)
 
     def _draw_status_bubbles_pass(self):
-        scale, _, _ = self._get_transform()
+        scale = self._xform[0]
 
         # 计算元素缩放（图标增长速度低于地图）
         element_scale = scale
@@ -468,13 +572,13 @@ class Renderer:
             element_scale = scale / self.scale_factor * (self.scale_factor**0.7)
 
         for char in self.sim.characters:
-            if hasattr(char, "render_pos"):
+            if char.render_pos is not None:
                 x, y = char.render_pos
                 self._draw_status_bubble(char, x, y, element_scale)
 
     def _draw_status_bubble(self, char, x, y, scale):
         # 优先使用 LLM 返回的表情，若无则使用规则判断
-        status_icon = getattr(char, "emoji", None)
+        status_icon = char.emoji
 
         # 回退逻辑
         if not status_icon or status_icon == "👤":
@@ -495,7 +599,7 @@ class Renderer:
             bubble_y = y - 15 * scale
 
             # 绘制表情图标
-            icon_surf = self.icon_font.render(status_icon, True, BLACK)
+            icon_surf = self._render_text(self.icon_font, status_icon, BLACK)
 
             # 计算圆角矩形（胶囊形）尺寸
             # 气泡基础高度（较小）
@@ -519,43 +623,60 @@ class Renderer:
             # 气泡矩形
             rect = pygame.Rect(0, 0, bubble_w, bubble_h)
             rect.center = (bubble_x, bubble_y)
+            if not rect.colliderect(self._view_rect):
+                return
 
-            # 绘制圆角矩形
+            # 圆角矩形、边框与图标合成为一张表面，相同表情与尺寸的气泡共用
             border_radius = int(bubble_h / 2)
+            bubble = self._bubble_surface(
+                status_icon, rect.size, text_w, text_h, border_radius
+            )
+            self.screen.blit(bubble, rect)
+
+    def _bubble_surface(
+        self, icon: str, size: tuple, text_w: int, text_h: int, border_radius: int
+    ) -> pygame.Surface:
+        """状态气泡（背景、边框与居中的图标）的合成表面，按全部绘制参数做 LRU 缓存"""
+        key = (icon, size, text_w, text_h, border_radius)
+        bubble = self._bubble_cache.get(key)
+        if bubble is None:
+            bubble = pygame.Surface(size, pygame.SRCALPHA)
+            rect = bubble.get_rect()
+            pygame.draw.rect(bubble, WHITE, rect, border_radius=border_radius)
+            pygame.draw.rect(bubble, BLACK, rect, 1, border_radius=border_radius)
+            icon_surf = self._scaled_icon(icon, text_w, text_h)
+            bubble.blit(icon_surf, icon_surf.get_rect(center=rect.center))
+            self._bubble_cache[key] = bubble
+            if len(self._bubble_cache) > ICON_CACHE_MAXSIZE:
+                self._bubble_cache.popitem(last=False)
+        else:
+            self._bubble_cache.move_to_end(key)
+        return bubble
 
-            pygame.draw.rect(self.screen, WHITE, rect, border_radius=border_radius)
-            pygame.draw.rect(self.screen, BLACK, rect, 1, border_radius=border_radius)
-
-            # 缩放并绘制文本
-            try:
-                icon_surf = pygame.transform.smoothscale(icon_surf, (text_w, text_h))
-            except ValueError:
-                icon_surf = pygame.transform.scale(icon_surf, (text_w, text_h))
-
-            icon_rect = icon_surf.get_rect(center=rect.center)
-            self.screen.blit(icon_surf, icon_rect)
+    def _notice_board_hitbox(self) -> tuple:
+        """小镇广场及其公告板在屏幕上的矩形（与 _draw_map 的绘制位置一致）"""
+        square = self.sim.game_map.get_location("小镇广场")
+        if not square:
+            return None, None
+        x, y = self._transform(*square.coordinates)
+        scale = self._xform[0]
+        size = int(60 * scale)
+        board_x = x + size // 2 + 10
+        board_y = y - size // 2
+        return square, pygame.Rect(board_x, board_y, 20 * scale, 15 * scale)
 
     def _draw_tooltips(self):
         mouse_pos = pygame.mouse.get_pos()
 
         # 1. Check for Notice Board tooltip (Town Square)
-        square = self.sim.game_map.get_location("小镇广场")
-        if square:
-            # Re-calculate board position (same logic as _draw_map)
-            x, y = self._transform(*square.coordinates)
-            scale, _, _ = self._get_transform()
-            size = int(60 * scale)
-            board_x = x + size // 2 + 10
-            board_y = y - size // 2
-            board_rect = pygame.Rect(board_x, board_y, 20 * scale, 15 * scale)
-
-            if board_rect.collidepoint(mouse_pos):
-                self._draw_notice_board_tooltip(square, mouse_pos)
-                return  # Prioritize board tooltip
+        square, board_rect = self._notice_board
+        if square and board_rect.collidepoint(mouse_pos):
+            self._draw_notice_board_tooltip(square, mouse_pos)
+            return  # Prioritize board tooltip
 
         # 2. Check for Character tooltips
         for char in self.sim.characters:
-            if hasattr(char, "render_pos"):
+            if char.render_pos is not None:
                 cx, cy = char.render_pos
                 # 检查与居民周围小半径是否碰撞
                 if (mouse_pos[0] - cx) ** 2 + (
@@ -566,15 +687,15 @@ class Renderer:
 
     def _draw_notice_board_tooltip(self, location, pos):
         lines = ["=== 社区公告板 ==="]
-        if hasattr(location, "notices") and location.notices:
+        if location.notices:
             for notice in location.notices:
                 lines.append(f"[{notice.created_at}] {notice.author}:")
-                # Simple wrap for content
+                # Simple wrap for content：每 20 个字符一行，空内容也保留一行
                 content = notice.content
-                while len(content) > 20:
-                    lines.append("  " + content[:20])
-                    content = content[20:]
-                lines.append("  " + content)
+                lines.extend(
+                    "  " + content[i : i + 20]
+                    for i in range(0, max(len(content), 1), 20)
+                )
                 lines.append("-" * 20)
         else:
             lines.append("(暂无公告)")
@@ -596,7 +717,7 @@ class Renderer:
         height = 0
         surfaces = []
         for line in lines:
-            surf = self.font.render(line, True, BLACK)
+            surf = self._render_text(self.font, line, BLACK)
             max_width = max(max_width, surf.get_width())
             height += surf.get_height() + 2
             surfaces.append(surf)
@@ -617,77 +738,68 @@ class Renderer:
             self.screen.blit(surf, (box_rect.x + 5, y))
             y += surf.get_height() + 2
 
-    def _draw_character_tooltip(self, char, pos):
-        lines = [
-            f"姓名: {char.profile.name}",
-            f"状态: {self._translate_status(char.status)}",
-            f"位置: {char.current_location}",
-            f"职业: {char.profile.occupation}",
-        ]
-
-        # 计算提示框大小
-        max_width = 0
-        height = 0
-        surfaces = []
-        for line in lines:
-            surf = self.font.render(line, True, BLACK)
-            max_width = max(max_width, surf.get_width())
-            height += surf.get_height() + 2
-            surfaces.append(surf)
-
-        box_rect = pygame.Rect(pos[0] + 10, pos[1] + 10, max_width + 10, height + 10)
-
-        # 确保提示框保持在屏幕内
-        if box_rect.right > self.screen.get_width():
-            box_rect.x -= box_rect.width + 20
-        if box_rect.bottom > self.screen.get_height():
-            box_rect.y -= box_rect.height + 20
-
-        pygame.draw.rect(self.screen, (255, 255, 220), box_rect)
-        pygame.draw.rect(self.screen, BLACK, box_rect, 1)
-
-        y = box_rect.y + 5
-        for surf in surfaces:
-            self.screen.blit(surf, (box_rect.x + 5, y))
-            y += surf.get_height() + 2
-
     def _draw_ui(self):
         # Display time with weekday
         time_str = self.sim.game_time.get_display_string()
-        time_surf = self.title_font.render(time_str, True, WHITE)
+        time_surf = self._render_text(self.title_font, time_str, WHITE)
         self.screen.blit(time_surf, (10, 10))
 
-        # 居民状态列表（侧边栏）
+        # 居民状态列表（侧边栏）：内容只随居民状态变化，缓存为整块表面
         panel_x = self.screen.get_width() - 300  # 更宽的面板
-        pygame.draw.rect(
-            self.screen, (50, 50, 50), (panel_x, 0, 300, self.screen.get_height())
-        )
+        height = self.screen.get_height()
+        key = (height, tuple((c.profile.name, c.status) for c in self.sim.characters))
+        if key != self._panel_key:
+            if self._panel is None or self._panel.get_height() != height:
+                self._panel = pygame.Surface((300, height)).convert()
+            self._draw_panel(self._panel)
+            self._panel_key = key
+        self.screen.blit(self._panel, (panel_x, 0))
+
+    def _draw_panel(self, panel: pygame.Surface):
+        panel.fill((50, 50, 50))
 
         y = 10
-        header = self.title_font.render("居民状态", True, WHITE)
-        self.screen.blit(header, (panel_x + 10, y))
+        header = self._render_text(self.title_font, "居民状态", WHITE)
+        panel.blit(header, (10, y))
         y += 30
 
         for char in self.sim.characters:
-            name_surf = self.font.render(f"{char.profile.name}:", True, YELLOW)
-            self.screen.blit(name_surf, (panel_x + 10, y))
+            name_surf = self._render_text(self.font, f"{char.profile.name}:", YELLOW)
+            panel.blit(name_surf, (10, y))
             y += 15
 
             # 处理多行状态（尤其是对话）
-            status_text = self._translate_status(char.status)
-            # 简单的状态换行逻辑
-            words = status_text.split(" ")
-            line = ""
-            for word in words:
-                test_line = line + word + " "
-                if self.font.size(test_line)[0] < 280:
-                    line = test_line
-                else:
-                    status_surf = self.font.render(line, True, WHITE)
-                    self.screen.blit(status_surf, (panel_x + 20, y))
-                    y += 15
-                    line = word + " "
-            if line:
-                status_surf = self.font.render(line, True, WHITE)
-                self.screen.blit(status_surf, (panel_x + 20, y))
+            lines = self._wrap_status(self._translate_status(char.status))
+            for line in lines[:-1]:
+                status_surf = self._render_text(self.font, line, WHITE)
+                panel.blit(status_surf, (20, y))
+                y += 15
+            if lines[-1]:
+                status_surf = self._render_text(self.font, lines[-1], WHITE)
+                panel.blit(status_surf, (20, y))
                 y += 25
+
+    def _wrap_status(self, status_text: str) -> tuple:
+        """按 280 像素宽度折行，最后一行可能为空；结果按文本缓存，同一状态只测量一次"""
+        lines = self._wrap_cache.get(status_text)
+        if lines is not None:
+            self._wrap_cache.move_to_end(status_text)
+            return lines
+
+        # 简单的状态换行逻辑
+        wrapped = []
+        line = ""
+        for word in status_text.split(" "):
+            test_line = line + word + " "
+            if self.font.size(test_line)[0] < 280:
+                line = test_line
+            else:
+                wrapped.append(line)
+                line = word + " "
+        wrapped.append(line)
+
+        lines = tuple(wrapped)
+        self._wrap_cache[status_text] = lines
+        if len(self._wrap_cache) > WRAP_CACHE_MAXSIZE:
+            self._wrap_cache.popitem(last=False)
+        return lines